@@ -1,3 +1,4 @@
+import sys
 import time
 import json
 import csv
@@ -6,18 +7,281 @@ import random
 import os
 import tempfile
 import shutil
+import mmap
+import pickle
+import queue
+import threading
+from collections import Counter, deque
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.common.action_chains import ActionChains
+import lxml.html
+from lxml import etree
 
 from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 import torch
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# Token-length buckets for batched sentiment inference
+SENTIMENT_BUCKETS = (32, 64, 128, 256, 512)
+SENTIMENT_BATCH_SIZE = 32
+
+# RoBERTa label -> class code (0 negative, 1 neutral, 2 positive)
+LABEL_CODES = {
+    'negative': 0, 'label_0': 0,
+    'neutral': 1, 'label_1': 1,
+    'positive': 2, 'label_2': 2
+}
+SENTIMENT_NAMES = ("negative", "neutral", "positive")
+
+# Host OS as (navigator.platform, Sec-CH-UA-Platform, platform version, UA string token);
+# rotated user agents stay on the host OS and on the running Chrome's major version, so
+# they agree with the rest of the browser
+UA_HOST = {
+    'win32': ('Win32', 'Windows', '10.0.0', 'Windows NT 10.0; Win64; x64'),
+    'darwin': ('MacIntel', 'macOS', '10.15.7', 'Macintosh; Intel Mac OS X 10_15_7'),
+}.get(sys.platform, ('Linux x86_64', 'Linux', '', 'X11; Linux x86_64'))
+
+# (major, build, patch) of the driver's browserVersion capability, e.g. "131.0.6778.85"
+CHROME_VERSION_RE = re.compile(r'(\d+)\.\d+\.(\d+)\.(\d+)')
+
+# Patch builds below the running one that are rotated through per product URL
+UA_PATCH_OFFSETS = (0, 7, 19)
+
+
+def chrome_full_versions(browser_version: Optional[str]) -> Tuple[str, ...]:
+    """
+    Full Chrome versions to rotate through: the running browser's own version and
+    a few earlier patch builds of the same major. Empty if the version is unknown.
+    """
+    match = CHROME_VERSION_RE.match(browser_version or '')
+    if not match:
+        return ()
+    major, build, patch = match.groups()
+    return tuple(dict.fromkeys(f"{major}.0.{build}.{max(0, int(patch) - offset)}"
+                               for offset in UA_PATCH_OFFSETS))
+
+# Cheap page-source prefilter covering every CAPTCHA XPath indicator below
+# (captcha iframes/ids/classes, challenge iframes, "Press" anywhere in the text, matched
+# as a bare substring like the XPath contains() checks)
+CAPTCHA_HINT_RE = re.compile(r'captcha|challenge|press', re.IGNORECASE)
+
+# Precompiled XPath selectors, reused across every page snapshot
+REVIEW_XPATHS = [etree.XPath(x) for x in (
+    "//*[contains(@data-testid, 'review')]",
+    "//*[contains(@class, 'review-') and not(contains(@class, 'button'))]",
+    "//div[contains(@class, 'customer-review')]",
+    "//article[contains(@class, 'review')]",
+    "//*[@itemprop='review']"
+)]
+NAME_XPATHS = [etree.XPath(x) for x in (
+    ".//*[contains(@class, 'reviewer')]",
+    ".//*[contains(@class, 'author')]",
+    ".//*[contains(@class, 'name')]",
+    ".//*[contains(@class, 'user')]"
+)]
+RATING_XPATHS = [etree.XPath(x) for x in (
+    ".//*[contains(@aria-label, 'star')]",
+    ".//*[contains(@class, 'rating')]",
+    ".//*[contains(@class, 'stars')]"
+)]
+TITLE_XPATHS = [etree.XPath(x) for x in (
+    ".//*[contains(@class, 'title')]",
+    ".//*[contains(@class, 'headline')]",
+    ".//h3",
+    ".//h4"
+)]
+TEXT_XPATHS = [etree.XPath(x) for x in (
+    ".//*[contains(@class, 'review-text')]",
+    ".//*[contains(@class, 'review-body')]",
+    ".//*[contains(@class, 'comment')]",
+    ".//*[contains(@class, 'content')]",
+    ".//p"
+)]
+DATE_XPATHS = [etree.XPath(x) for x in (
+    ".//*[contains(@class, 'date')]",
+    ".//*[contains(@class, 'time')]",
+    ".//*[contains(@class, 'timestamp')]"
+)]
+
+
+def node_text(node) -> str:
+    """Whitespace-collapsed text of an lxml node (close to Selenium's element.text)"""
+    return " ".join(node.text_content().split())
+
+
+def write_json(path: str, data):
+    """Serialize data to an indented JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def jsonl_line(data) -> bytes:
+    """Encode data as a single UTF-8 JSON Lines record"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+
+def write_combined_json(path: str, metadata: Dict, jsonl_path: str):
+    """
+    Write the combined JSON file, streaming the products back from the
+    JSON Lines file instead of holding every product in memory.
+    """
+    if orjson is not None:
+        metadata_bytes = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+    else:
+        metadata_bytes = json.dumps(metadata, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    with open(path, 'wb') as out, open(jsonl_path, 'rb') as products:
+        out.write(b'{\n  "metadata": ' + metadata_bytes.replace(b'\n', b'\n  ') + b',\n  "products": [')
+        first = True
+        for line in products:
+            line = line.rstrip(b'\n')
+            if not line:
+                continue
+            out.write(b'\n    ' if first else b',\n    ')
+            out.write(line)
+            first = False
+        out.write(b'\n  ]\n}' if not first else b']\n}')
+
+
+class BackgroundWriter:
+    """
+    Daemon thread that serializes and appends JSON Lines records from a
+    bounded queue, so the scrape loop can move on to the next URL while the
+    previous product is written to disk.
+    """
+    
+    def __init__(self, maxsize: int = 8):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                fh, data = item
+                try:
+                    fh.write(jsonl_line(data))
+                except Exception as e:
+                    print(f"Warning: Could not write {fh.name}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    def append_line(self, fh, data):
+        """Queue data to be appended as one JSON Lines record to an open binary file (blocks only if the queue is full)"""
+        self.queue.put((fh, data))
+    
+    def drain(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for queued writes; True if all finished"""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+    
+    def close(self):
+        """Wait for queued writes to finish and stop the thread"""
+        self.queue.put(None)
+        self.thread.join()
+
+
+_now_cache = {"second": None, "values": {}}
+
+
+def now_str(fmt: str = None) -> str:
+    """Current local time formatted with fmt (ISO 8601 if None), cached per second"""
+    second = int(time.time())
+    if second != _now_cache["second"]:
+        _now_cache["second"] = second
+        _now_cache["values"] = {}
+    
+    values = _now_cache["values"]
+    if fmt not in values:
+        now = datetime.fromtimestamp(second)
+        values[fmt] = now.isoformat() if fmt is None else now.strftime(fmt)
+    return values[fmt]
+
+
+def text_hash(text: str) -> int:
+    """64-bit hash of a review body for the dedup set"""
+    if xxhash is not None:
+        return xxhash.xxh64_intdigest(text)
+    return hash(text)
+
+
+# Pre-encoded (ASCII) per-product header for the main loop
+PRODUCT_HEADER = b"\n" + b"=" * 60 + b"\nSCRAPING PRODUCT %d/%d\n" + b"=" * 60 + b"\n"
+
+
+def write_bytes(data: bytes):
+    """Write pre-encoded bytes to stdout, keeping order with print()"""
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None:
+        sys.stdout.write(data.decode('ascii'))
+        return
+    sys.stdout.flush()
+    out.write(data)
+
+
+COMBINED_CSV_FIELDS = ['product_id', 'product_name', 'product_url', 'reviewer_name', 'rating', 
+                       'sentiment', 'confidence', 'score', 'roberta_label', 'method', 'title', 
+                       'review_text', 'date', 'verified_purchase', 'helpful_count']
+
+
+def new_review_stats() -> Dict:
+    """Empty per-review columns for the overall batch summary"""
+    return {
+        "sentiment": [],
+        "confidence": [],
+        "score": [],
+        "rating": [],
+        "methods": Counter(),
+        "verified": 0
+    }
+
+
+def update_review_stats(stats: Dict, review: Dict):
+    """Append a single review to the summary columns"""
+    stats["sentiment"].append(LABEL_CODES.get(review.get('sentiment'), -1))
+    stats["confidence"].append(review.get('confidence') or np.nan)
+    
+    score = review.get('score')
+    stats["score"].append(np.nan if score is None else score)
+    stats["rating"].append(review.get('rating') or np.nan)
+    
+    method = review.get('method', 'unknown')
+    stats["methods"][method] += 1
+    
+    if review.get('verified_purchase'):
+        stats["verified"] += 1
 
 
 class WalmartReviewScraper:
@@ -44,6 +308,7 @@ class WalmartReviewScraper:
         print(f"Using temporary profile: {self.temp_profile_dir}")
         
         self.driver = uc.Chrome(options=options, version_main=None)
+        self.chrome_versions = chrome_full_versions(self.driver.capabilities.get('browserVersion'))
         self.wait = WebDriverWait(self.driver, 8)
         self.short_wait = WebDriverWait(self.driver, 3)
         
@@ -96,6 +361,50 @@ class WalmartReviewScraper:
             except Exception as e:
                 print(f"Warning: Could not delete temp profile: {e}")
     
+    def set_user_agent(self, full_version: str) -> str:
+        """
+        Override the browser user agent for subsequent navigations with Chrome
+        full_version (one of self.chrome_versions), along with a navigator.platform
+        and Sec-CH-UA client hints that match it. Returns the user agent string.
+        """
+        major = full_version.split('.', 1)[0]
+        navigator_platform, hint_platform, platform_version, os_token = UA_HOST
+        # Chrome's reduced UA string only carries the major version
+        user_agent = f"Mozilla/5.0 ({os_token}) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36"
+        brands = [
+            {"brand": "Google Chrome", "version": major},
+            {"brand": "Chromium", "version": major},
+            {"brand": "Not_A Brand", "version": "24"}
+        ]
+        
+        self.driver.execute_cdp_cmd("Network.setUserAgentOverride", {
+            "userAgent": user_agent,
+            "platform": navigator_platform,
+            "userAgentMetadata": {
+                "brands": brands,
+                "fullVersionList": [
+                    dict(b, version=full_version if b['version'] == major else f"{b['version']}.0.0.0")
+                    for b in brands
+                ],
+                "platform": hint_platform,
+                "platformVersion": platform_version,
+                "architecture": "x86",
+                "bitness": "64",
+                "model": "",
+                "mobile": False
+            }
+        })
+        return user_agent
+    
+    def reset_context(self):
+        """Clear cookies and storage between products without restarting the browser"""
+        self.driver.delete_all_cookies()
+        try:
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        self.driver.get('about:blank')
+    
     def __del__(self):
         """Clean up the browser when done"""
         try:
@@ -121,6 +430,12 @@ class WalmartReviewScraper:
     
     def check_captcha_quick(self) -> bool:
         """Quick non-blocking check for CAPTCHA during scraping"""
+        try:
+            if not CAPTCHA_HINT_RE.search(self.driver.page_source):
+                return False
+        except:
+            pass
+        
         captcha_indicators = [
             "//iframe[contains(@src, 'captcha')]",
             "//iframe[contains(@src, 'challenge')]",
@@ -146,93 +461,130 @@ class WalmartReviewScraper:
         
         return False
     
+    def rating_fallback(self, rating: Optional[float]) -> Dict:
+        """Rating-based sentiment used when RoBERTa is unavailable or fails"""
+        if rating is not None:
+            if rating >= 4:
+                return {"sentiment": "positive", "confidence": 0.8, "score": 0.8, "method": "rating_fallback"}
+            elif rating <= 2:
+                return {"sentiment": "negative", "confidence": 0.8, "score": 0.2, "method": "rating_fallback"}
+            else:
+                return {"sentiment": "neutral", "confidence": 0.7, "score": 0.5, "method": "rating_fallback"}
+        else:
+            return {"sentiment": "neutral", "confidence": 0.5, "score": 0.5, "method": "default"}
+    
     def classify_sentiment(self, review_text: str, rating: Optional[float], title: str = "") -> Dict:
         """Classify review sentiment using RoBERTa"""
-        text_to_analyze = f"{title} {review_text}".strip()
-        
-        if not text_to_analyze:
-            return {
-                "sentiment": "neutral",
-                "confidence": 0.0,
-                "score": 0.0,
-                "method": "default"
-            }
+        return self.classify_sentiment_batch([(review_text, rating, title)])[0]
+    
+    def classify_sentiment_batch(self, items: List[Tuple[str, Optional[float], str]]) -> List[Dict]:
+        """
+        Classify a batch of (review_text, rating, title) tuples using RoBERTa.
+        Texts are sorted by token length and run in length buckets so short
+        reviews are not padded up to the longest review in the batch.
+        """
+        results = [None] * len(items)
+        texts = []
+        indices = []
         
-        if self.sentiment_pipeline is None:
-            if rating is not None:
-                if rating >= 4:
-                    return {"sentiment": "positive", "confidence": 0.8, "score": 0.8, "method": "rating_fallback"}
-                elif rating <= 2:
-                    return {"sentiment": "negative", "confidence": 0.8, "score": 0.2, "method": "rating_fallback"}
-                else:
-                    return {"sentiment": "neutral", "confidence": 0.7, "score": 0.5, "method": "rating_fallback"}
+        for i, (review_text, rating, title) in enumerate(items):
+            text_to_analyze = f"{title} {review_text}".strip()
+            
+            if not text_to_analyze:
+                results[i] = {
+                    "sentiment": "neutral",
+                    "confidence": 0.0,
+                    "score": 0.0,
+                    "method": "default"
+                }
+            elif self.sentiment_pipeline is None:
+                results[i] = self.rating_fallback(rating)
             else:
-                return {"sentiment": "neutral", "confidence": 0.5, "score": 0.5, "method": "default"}
+                texts.append(text_to_analyze[:2000])
+                indices.append(i)
+        
+        if not texts:
+            return results
         
         try:
-            if len(text_to_analyze) > 2000:
-                text_to_analyze = text_to_analyze[:2000]
-            
-            result = self.sentiment_pipeline(text_to_analyze)[0]
-            raw_label = result['label'].lower()
-            
-            if raw_label in ['negative', 'label_0']:
-                sentiment = "negative"
-            elif raw_label in ['neutral', 'label_1']:
-                sentiment = "neutral"
-            elif raw_label in ['positive', 'label_2']:
-                sentiment = "positive"
-            else:
-                sentiment = "neutral"
+            lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=512)['input_ids']]
             
-            confidence = result['score']
+            buckets = {size: [] for size in SENTIMENT_BUCKETS}
+            for j in sorted(range(len(texts)), key=lengths.__getitem__):
+                size = next((s for s in SENTIMENT_BUCKETS if lengths[j] <= s), SENTIMENT_BUCKETS[-1])
+                buckets[size].append(j)
             
-            if sentiment == "negative":
-                score = (1 - confidence) * 0.5
-            elif sentiment == "neutral":
-                score = 0.5
-            else:
-                score = 0.5 + (confidence * 0.5)
-            
-            method = "roberta"
+            outputs = [None] * len(texts)
+            for bucket in buckets.values():
+                if not bucket:
+                    continue
+                bucket_outputs = self.sentiment_pipeline(
+                    [texts[j] for j in bucket],
+                    batch_size=SENTIMENT_BATCH_SIZE
+                )
+                for j, output in zip(bucket, bucket_outputs):
+                    outputs[j] = output
             
-            if rating is not None:
-                if (sentiment == "positive" and rating >= 4) or \
-                   (sentiment == "negative" and rating <= 2) or \
-                   (sentiment == "neutral" and rating == 3):
-                    confidence = min(confidence * 1.1, 1.0)
-                    method = "roberta_aligned"
-                elif confidence < 0.6:
-                    if rating >= 4 and sentiment != "positive":
-                        sentiment = "positive"
-                        confidence = 0.75
-                        score = 0.75
-                        method = "roberta_rating_adjusted"
-                    elif rating <= 2 and sentiment != "negative":
-                        sentiment = "negative"
-                        confidence = 0.75
-                        score = 0.25
-                        method = "roberta_rating_adjusted"
-            
-            return {
-                "sentiment": sentiment,
-                "confidence": round(confidence, 4),
-                "score": round(score, 4),
-                "roberta_label": result['label'],
-                "method": method
-            }
+            finalized = self.finalize_sentiment_batch(outputs, [items[i][1] for i in indices])
+            for i, result in zip(indices, finalized):
+                results[i] = result
             
         except Exception as e:
             print(f"RoBERTa error: {e}")
-            if rating is not None:
-                if rating >= 4:
-                    return {"sentiment": "positive", "confidence": 0.8, "score": 0.8, "method": "rating_fallback"}
-                elif rating <= 2:
-                    return {"sentiment": "negative", "confidence": 0.8, "score": 0.2, "method": "rating_fallback"}
-                else:
-                    return {"sentiment": "neutral", "confidence": 0.7, "score": 0.5, "method": "rating_fallback"}
+            for i in indices:
+                results[i] = self.rating_fallback(items[i][1])
+        
+        return results
+    
+    def finalize_sentiment_batch(self, outputs: List[Dict], ratings: List[Optional[float]]) -> List[Dict]:
+        """
+        Map raw RoBERTa predictions to sentiment/score and align them with the
+        star ratings, vectorized over the whole batch.
+        """
+        codes = np.array([LABEL_CODES.get(o['label'].lower(), 1) for o in outputs], dtype=np.int8)
+        confs = np.array([o['score'] for o in outputs], dtype=np.float64)
+        r = np.array([np.nan if x is None else x for x in ratings], dtype=np.float64)
+        
+        scores = np.where(codes == 0, (1 - confs) * 0.5,
+                          np.where(codes == 1, 0.5, 0.5 + confs * 0.5))
+        
+        with np.errstate(invalid='ignore'):
+            has_rating = ~np.isnan(r)
+            aligned = has_rating & (((codes == 2) & (r >= 4)) |
+                                    ((codes == 0) & (r <= 2)) |
+                                    ((codes == 1) & (r == 3)))
+            low = has_rating & ~aligned & (confs < 0.6)
+            to_positive = low & (r >= 4) & (codes != 2)
+            to_negative = low & (r <= 2) & (codes != 0)
+        adjusted = to_positive | to_negative
+        
+        confs = np.where(aligned, np.minimum(confs * 1.1, 1.0), confs)
+        confs[adjusted] = 0.75
+        scores[to_positive] = 0.75
+        scores[to_negative] = 0.25
+        codes[to_positive] = 2
+        codes[to_negative] = 0
+        
+        confs = np.round(confs, 4).tolist()
+        scores = np.round(scores, 4).tolist()
+        
+        results = []
+        for k, output in enumerate(outputs):
+            if adjusted[k]:
+                method = "roberta_rating_adjusted"
+            elif aligned[k]:
+                method = "roberta_aligned"
             else:
-                return {"sentiment": "neutral", "confidence": 0.5, "score": 0.5, "method": "default"}
+                method = "roberta"
+            results.append({
+                "sentiment": SENTIMENT_NAMES[codes[k]],
+                "confidence": confs[k],
+                "score": scores[k],
+                "roberta_label": output['label'],
+                "method": method
+            })
+        
+        return results
     
     def extract_product_id(self, url: str) -> Optional[str]:
         """Extract product ID from Walmart URL"""
@@ -377,146 +729,97 @@ class WalmartReviewScraper:
             print("\n⚠️ CAPTCHA DETECTED after scrolling!")
             return [], True
         
-        review_selectors = [
-            "//*[contains(@data-testid, 'review')]",
-            "//*[contains(@class, 'review-') and not(contains(@class, 'button'))]",
-            "//div[contains(@class, 'customer-review')]",
-            "//article[contains(@class, 'review')]",
-            "//*[@itemprop='review']"
-        ]
+        # One DOM snapshot per page, parsed locally instead of per-element WebDriver calls
+        html = self.driver.execute_script("return document.documentElement.outerHTML")
+        try:
+            tree = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            return [], False
         
         review_elements = []
-        for selector in review_selectors:
-            try:
-                elements = self.driver.find_elements(By.XPATH, selector)
-                filtered_elements = [e for e in elements if len(e.text) > 50]
-                
-                if filtered_elements and len(filtered_elements) > len(review_elements):
-                    review_elements = filtered_elements
-            except:
-                continue
+        for selector in REVIEW_XPATHS:
+            elements = [e for e in selector(tree) if len(node_text(e)) > 50]
+            
+            if elements and len(elements) > len(review_elements):
+                review_elements = elements
         
         if not review_elements:
             return [], False
         
         reviews = []
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(self.extract_review_from_element, elem) 
-                      for elem in review_elements]
-            results = [f.result() for f in futures]
-        
-        for review_data in results:
+        for element in review_elements:
+            review_data = self.extract_review_from_element(element)
             if review_data and review_data.get('review_text'):
                 review_text = review_data['review_text']
                 if review_text not in seen_texts and len(review_text) > 10:
-                    sentiment_result = self.classify_sentiment(
-                        review_data['review_text'],
-                        review_data.get('rating'),
-                        review_data.get('title', '')
-                    )
-                    
-                    review_data.update(sentiment_result)
                     reviews.append(review_data)
                     seen_texts.add(review_text)
         
+        sentiment_results = self.classify_sentiment_batch([
+            (r['review_text'], r.get('rating'), r.get('title', '')) for r in reviews
+        ])
+        for review_data, sentiment_result in zip(reviews, sentiment_results):
+            review_data.update(sentiment_result)
+        
         return reviews, False
     
     def extract_review_from_element(self, element) -> Optional[Dict]:
-        """Extract review data from a Selenium WebElement"""
+        """Extract review data from a parsed lxml review node"""
         try:
             review_data = {}
-            element_text = element.text
+            element_text = node_text(element)
             
-            name_selectors = [
-                ".//*[contains(@class, 'reviewer')]",
-                ".//*[contains(@class, 'author')]",
-                ".//*[contains(@class, 'name')]",
-                ".//*[contains(@class, 'user')]"
-            ]
             reviewer_name = 'Anonymous'
-            for sel in name_selectors:
-                try:
-                    reviewer = element.find_element(By.XPATH, sel)
-                    name = reviewer.text.strip()
+            for sel in NAME_XPATHS:
+                matches = sel(element)
+                if matches:
+                    name = node_text(matches[0])
                     if name and 0 < len(name) < 50:
                         reviewer_name = name
                         break
-                except:
-                    continue
             review_data['reviewer_name'] = reviewer_name
             
-            rating_selectors = [
-                ".//*[contains(@aria-label, 'star')]",
-                ".//*[contains(@class, 'rating')]",
-                ".//*[contains(@class, 'stars')]"
-            ]
-            for sel in rating_selectors:
-                try:
-                    rating_elem = element.find_element(By.XPATH, sel)
-                    rating_text = rating_elem.get_attribute('aria-label') or rating_elem.text
+            for sel in RATING_XPATHS:
+                matches = sel(element)
+                if matches:
+                    rating_text = matches[0].get('aria-label') or node_text(matches[0])
                     rating_match = re.search(r'(\d+\.?\d*)', rating_text)
                     if rating_match:
                         review_data['rating'] = float(rating_match.group(1))
                         break
-                except:
-                    continue
             
             if 'rating' not in review_data:
                 review_data['rating'] = None
             
-            title_selectors = [
-                ".//*[contains(@class, 'title')]",
-                ".//*[contains(@class, 'headline')]",
-                ".//h3",
-                ".//h4"
-            ]
             title = ''
-            for sel in title_selectors:
-                try:
-                    title_elem = element.find_element(By.XPATH, sel)
-                    title = title_elem.text.strip()
+            for sel in TITLE_XPATHS:
+                matches = sel(element)
+                if matches:
+                    title = node_text(matches[0])
                     if title and 0 < len(title) < 200:
                         break
-                except:
-                    continue
             review_data['title'] = title
             
-            text_selectors = [
-                ".//*[contains(@class, 'review-text')]",
-                ".//*[contains(@class, 'review-body')]",
-                ".//*[contains(@class, 'comment')]",
-                ".//*[contains(@class, 'content')]",
-                ".//p"
-            ]
             review_text = ''
-            for sel in text_selectors:
-                try:
-                    text_elem = element.find_element(By.XPATH, sel)
-                    text = text_elem.text.strip()
+            for sel in TEXT_XPATHS:
+                matches = sel(element)
+                if matches:
+                    text = node_text(matches[0])
                     if text and len(text) > len(review_text):
                         review_text = text
-                except:
-                    continue
             
             if not review_text:
                 review_text = element_text
             
             review_data['review_text'] = review_text
             
-            date_selectors = [
-                ".//*[contains(@class, 'date')]",
-                ".//*[contains(@class, 'time')]",
-                ".//*[contains(@class, 'timestamp')]"
-            ]
             date_text = ''
-            for sel in date_selectors:
-                try:
-                    date_elem = element.find_element(By.XPATH, sel)
-                    date_text = date_elem.text.strip()
+            for sel in DATE_XPATHS:
+                matches = sel(element)
+                if matches:
+                    date_text = node_text(matches[0])
                     if date_text:
                         break
-                except:
-                    continue
             review_data['date'] = date_text
             
             verified_text = element_text.lower()
@@ -536,7 +839,7 @@ class WalmartReviewScraper:
     def save_to_json(self, reviews: List[Dict], filename: str = None):
         """Save reviews to JSON file with sentiment grouping"""
         if filename is None:
-            filename = f"walmart_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            filename = f"walmart_reviews_{now_str('%Y%m%d_%H%M%S')}.json"
         
         positive_reviews = [r for r in reviews if r.get('sentiment') == 'positive']
         negative_reviews = [r for r in reviews if r.get('sentiment') == 'negative']
@@ -558,7 +861,7 @@ class WalmartReviewScraper:
                 "average_score": round(avg_score, 4),
                 "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
                 "device": "GPU (CUDA)" if self.device == 0 else "CPU",
-                "scraped_at": datetime.now().isoformat()
+                "scraped_at": now_str()
             },
             "reviews": {
                 "all": reviews,
@@ -568,9 +871,8 @@ class WalmartReviewScraper:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
-        
+        write_json(filename, output)
+
         print(f"Reviews saved to {filename}")
         print(f"Positive: {len(positive_reviews)} | Negative: {len(negative_reviews)} | Neutral: {len(neutral_reviews)}")
         print(f"Average Confidence: {avg_confidence:.2%} | Avg Score: {avg_score:.3f}")
@@ -578,7 +880,7 @@ class WalmartReviewScraper:
     def save_to_csv(self, reviews: List[Dict], filename: str = None):
         """Save reviews to CSV file with sentiment"""
         if filename is None:
-            filename = f"walmart_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filename = f"walmart_reviews_{now_str('%Y%m%d_%H%M%S')}.csv"
         
         if not reviews:
             print("No reviews to save")
@@ -772,7 +1074,7 @@ class WalmartReviewScraper:
             "product_url": url,
             "product_name": product_name,
             "reviews": all_reviews,
-            "scraped_at": datetime.now().isoformat()
+            "scraped_at": now_str()
         }
 
 
@@ -783,45 +1085,121 @@ def read_urls_from_file(txt_file: str) -> List[str]:
     if not os.path.exists(txt_file):
         raise FileNotFoundError(f"File not found: {txt_file}")
     
-    with open(txt_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                urls.append(line)
+    with open(txt_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return urls
+        
+        # Scan raw bytes and only decode lines that are real URLs
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in mm[:].splitlines():
+                line = line.strip()
+                if line and not line.startswith(b'#'):
+                    urls.append(line.decode('utf-8'))
     
     return urls
 
 
-def mark_url_as_completed(txt_file: str, completed_url: str, product_id: str = None):
-    """Remove completed URL from original file and add it to completed file"""
-    try:
-        if not os.path.exists(txt_file):
-            return
+class URLQueue:
+    """
+    In-memory view of a links file. Progress is checkpointed to a small
+    pickle state file every few completions; the links file itself is only
+    rewritten when the batch stops (finished, interrupted or crashed).
+    """
+    
+    def __init__(self, txt_file: str, flush_every: int = 10):
+        self.txt_file = txt_file
+        self.completed_file = txt_file.replace('.txt', '_completed.txt')
+        self.state_file = f"{os.path.splitext(txt_file)[0]}.state.pickle"
+        self.flush_every = flush_every
         
         with open(txt_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+            self.lines = [line for line in f if line.strip()]
         
-        remaining_lines = []
-        for line in lines:
-            if line.strip() and completed_url not in line:
-                remaining_lines.append(line)
+        self.index = {}
+        for i, line in enumerate(self.lines):
+            self.index.setdefault(line.strip(), []).append(i)
         
-        with open(txt_file, 'w', encoding='utf-8') as f:
-            f.writelines(remaining_lines)
+        self.state = {"done": set(), "last_product_id": None}
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'rb') as f:
+                    self.state = pickle.load(f)
+            except Exception as e:
+                print(f"Warning: Could not read checkpoint {self.state_file}: {e}")
         
-        completed_file = txt_file.replace('.txt', '_completed.txt')
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.done = set()
+        for url in self.state["done"]:
+            self.done.update(self.index.pop(url, []))
         
-        with open(completed_file, 'a', encoding='utf-8') as f:
-            if product_id:
-                f.write(f"{completed_url} # Completed at {timestamp} | Product ID: {product_id}\n")
-            else:
-                f.write(f"{completed_url} # Completed at {timestamp}\n")
+        self.pending = 0
+        self.rewritten = 0
+        self.completed_fh = open(self.completed_file, 'a', encoding='utf-8', buffering=1 << 16)
+    
+    def filter_pending(self, urls: List[str]) -> List[str]:
+        """Drop URLs already recorded as completed in the checkpoint"""
+        remaining = [url for url in urls if url not in self.state["done"]]
+        if len(remaining) != len(urls):
+            print(f"Skipping {len(urls) - len(remaining)} URLs already completed (from {self.state_file})")
+        return remaining
+    
+    def mark_url_as_completed(self, completed_url: str, product_id: str = None):
+        """Mark URL as completed; checkpointed on the next flush"""
+        self.done.update(self.index.pop(completed_url, []))
+        self.state["done"].add(completed_url)
+        self.state["last_product_id"] = product_id
+        timestamp = now_str('%Y-%m-%d %H:%M:%S')
+        
+        if product_id:
+            self.completed_fh.write(f"{completed_url} # Completed at {timestamp} | Product ID: {product_id}\n")
+        else:
+            self.completed_fh.write(f"{completed_url} # Completed at {timestamp}\n")
         
-        print(f"✓ Marked as completed and moved to {completed_file}")
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+    
+    def flush(self, force: bool = False):
+        """
+        Write the checkpoint and flush the completed log. With force=True the
+        links file is also rewritten without the completed URLs.
+        """
+        if not self.pending and not force:
+            return
+        if not force and self.pending < self.flush_every:
+            return
         
-    except Exception as e:
-        print(f"Warning: Could not update URL files: {e}")
+        try:
+            self.completed_fh.flush()
+            
+            if force and len(self.done) != self.rewritten:
+                remaining_lines = [line for i, line in enumerate(self.lines) if i not in self.done]
+                
+                # Write beside the original and swap in, so a kill mid-write can't truncate it
+                tmp = f"{self.txt_file}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.writelines(remaining_lines)
+                os.replace(tmp, self.txt_file)
+                
+                print(f"✓ Moved {len(self.done)} completed URL(s) from {self.txt_file} to {self.completed_file}")
+                self.rewritten = len(self.done)
+                # Links file now reflects these URLs, the checkpoint no longer needs them
+                self.state["done"] = set()
+            
+            tmp = f"{self.state_file}.tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump(self.state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.state_file)
+            
+            self.pending = 0
+            
+        except Exception as e:
+            print(f"Warning: Could not update URL files: {e}")
+    
+    def close(self):
+        """Final checkpoint and links-file rewrite, then close the completed log"""
+        self.flush(force=True)
+        if not self.completed_fh.closed:
+            self.completed_fh.close()
 
 
 def main():
@@ -840,6 +1218,10 @@ def main():
     
     scraper = None
     input_file = None
+    url_queue = None
+    csv_file = None
+    jsonl_file = None
+    writer = None
     
     try:
         print("Choose input method:")
@@ -864,6 +1246,8 @@ def main():
             try:
                 urls = read_urls_from_file(txt_file)
                 input_file = txt_file
+                url_queue = URLQueue(txt_file)
+                urls = url_queue.filter_pending(urls)
                 
                 if not urls:
                     print(f"\n{txt_file} is empty or all URLs have been processed!")
@@ -901,35 +1285,64 @@ def main():
         print("AUTO-SKIP: Automatically skip URLs when CAPTCHA appears")
         print("(Recommended for batch processing)\n")
         
-        all_products_data = []
-        all_reviews_combined = []
+        if input_file:
+            base_name = os.path.splitext(os.path.basename(input_file))[0]
+            combined_filename = f"walmart_reviews_{base_name}_combined_{now_str('%Y%m%d_%H%M%S')}"
+        else:
+            combined_filename = f"walmart_reviews_combined_{now_str('%Y%m%d_%H%M%S')}"
+        
+        # Combined CSV is streamed as products finish instead of built at the end
+        csv_file = open(f"{combined_filename}.csv", 'w', newline='', encoding='utf-8', buffering=1 << 20)
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(COMBINED_CSV_FIELDS)
+        
+        # Per-product results are appended to one JSON Lines file
+        jsonl_path = f"{combined_filename}_products.jsonl"
+        jsonl_file = open(jsonl_path, 'ab', buffering=1 << 20)
+        
+        writer = BackgroundWriter()
+        
+        product_summaries = deque()
+        stats = new_review_stats()
         skipped_urls = []
         captcha_skipped_count = 0
         
         for idx, url in enumerate(urls, 1):
-            print("\n" + "="*60)
-            print(f"SCRAPING PRODUCT {idx}/{len(urls)}")
-            print("="*60)
+            write_bytes(PRODUCT_HEADER % (idx, len(urls)))
+            
+            if scraper is None:
+                print(f"\nStarting fresh browser session for product {idx}...")
+                scraper = WalmartReviewScraper(headless=False)
             
-            print(f"\nStarting fresh browser session for product {idx}...")
-            scraper = WalmartReviewScraper(headless=False)
+            # Browser is only restarted on CAPTCHA or driver-level failures
+            recycle = False
             
             try:
+                user_agent = None
+                if scraper.chrome_versions:
+                    try:
+                        user_agent = scraper.set_user_agent(random.choice(scraper.chrome_versions))
+                    except Exception as e:
+                        print(f"Could not set user agent: {e}")
+                
                 result = scraper.scrape_reviews(url, auto_skip_captcha=True)
+                if result is not None:
+                    result['user_agent'] = user_agent
                 
                 if result.get('captcha_detected'):
                     print(f"\nCAPTCHA detected - URL auto-skipped")
                     captcha_skipped_count += 1
+                    recycle = True
                     skipped_urls.append({"url": url, "reason": "CAPTCHA", "product_id": result.get('product_id', 'UNKNOWN')})
-                    if input_file:
-                        mark_url_as_completed(input_file, url, f"CAPTCHA_{result.get('product_id', 'UNKNOWN')}")
+                    if url_queue:
+                        url_queue.mark_url_as_completed(url, f"CAPTCHA_{result.get('product_id', 'UNKNOWN')}")
                     continue
                 
                 if result.get('skipped'):
                     print(f"\nProduct skipped due to page error")
                     skipped_urls.append({"url": url, "reason": "Page Error", "product_id": result.get('product_id', 'UNKNOWN')})
-                    if input_file:
-                        mark_url_as_completed(input_file, url, f"SKIPPED_{result.get('product_id', 'UNKNOWN')}")
+                    if url_queue:
+                        url_queue.mark_url_as_completed(url, f"SKIPPED_{result.get('product_id', 'UNKNOWN')}")
                     continue
                 
                 if result and result.get('reviews'):
@@ -937,52 +1350,86 @@ def main():
                     
                     unique_reviews = []
                     seen = set()
+                    positive = negative = neutral = 0
+                    conf_sum, conf_n = 0.0, 0
+                    score_sum, score_n = 0.0, 0
+                    rating_sum, rating_n = 0.0, 0
+                    
+                    product_context = {
+                        'product_id': result['product_id'],
+                        'product_url': result['product_url'],
+                        'product_name': result.get('product_name', f"Product {result['product_id']}")
+                    }
                     
                     for review in reviews:
-                        key = review.get('review_text', '')
-                        if key and key not in seen and len(key) > 10:
+                        text = review.get('review_text', '')
+                        if len(text) <= 10:
+                            continue
+                        key = text_hash(text)
+                        if key not in seen:
                             seen.add(key)
-                            review['product_id'] = result['product_id']
-                            review['product_url'] = result['product_url']
-                            review['product_name'] = result.get('product_name', f"Product {result['product_id']}")
+                            review.update(product_context)
                             unique_reviews.append(review)
+                            update_review_stats(stats, review)
+                            
+                            sentiment = review.get('sentiment')
+                            if sentiment == 'positive':
+                                positive += 1
+                            elif sentiment == 'negative':
+                                negative += 1
+                            elif sentiment == 'neutral':
+                                neutral += 1
+                            
+                            if review.get('confidence'):
+                                conf_sum += review['confidence']
+                                conf_n += 1
+                            if review.get('score') is not None:
+                                score_sum += review['score']
+                                score_n += 1
+                            if review.get('rating'):
+                                rating_sum += review['rating']
+                                rating_n += 1
                     
                     if len(reviews) != len(unique_reviews):
                         print(f"Removed {len(reviews) - len(unique_reviews)} duplicates")
                     
+                    csv_writer.writerows([r.get(k, '') for k in COMBINED_CSV_FIELDS] for r in unique_reviews)
+                    
                     result['reviews'] = unique_reviews
-                    all_products_data.append(result)
-                    all_reviews_combined.extend(unique_reviews)
                     
                     product_id = result['product_id']
-                    base_filename = f"walmart_reviews_{product_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    
-                    with open(f"{base_filename}.json", 'w', encoding='utf-8') as f:
-                        json.dump(result, f, indent=2, ensure_ascii=False)
-                    print(f"\nSaved product data to {base_filename}.json")
+                    writer.append_line(jsonl_file, result)
+                    print(f"\nQueued product data for {jsonl_path}")
                     
                     print(f"\nProduct {idx} Summary:")
                     print(f"  Total Reviews: {len(unique_reviews)}")
-                    positive = sum(1 for r in unique_reviews if r.get('sentiment') == 'positive')
-                    negative = sum(1 for r in unique_reviews if r.get('sentiment') == 'negative')
-                    neutral = sum(1 for r in unique_reviews if r.get('sentiment') == 'neutral')
                     print(f"  Positive: {positive} | Negative: {negative} | Neutral: {neutral}")
                     
-                    confidences = [r.get('confidence', 0) for r in unique_reviews]
-                    scores = [r.get('score', 0) for r in unique_reviews if r.get('score') is not None]
-                    avg_conf = sum(confidences) / len(confidences) if confidences else 0
-                    avg_score = sum(scores) / len(scores) if scores else 0
+                    avg_conf = conf_sum / len(unique_reviews) if unique_reviews else 0
+                    avg_score = score_sum / score_n if score_n else 0
                     print(f"  Avg Confidence: {avg_conf:.2%} | Avg Score: {avg_score:.3f}")
                     
-                    if input_file:
-                        mark_url_as_completed(input_file, url, product_id)
+                    product_summaries.append({
+                        "product_id": product_id,
+                        "product_url": result['product_url'],
+                        "reviews": len(unique_reviews),
+                        "positive": positive,
+                        "negative": negative,
+                        "neutral": neutral,
+                        "avg_rating": rating_sum / rating_n if rating_n else None,
+                        "avg_confidence": conf_sum / conf_n if conf_n else None,
+                        "avg_score": avg_score if score_n else None
+                    })
+                    
+                    if url_queue:
+                        url_queue.mark_url_as_completed(url, product_id)
                     
                 else:
                     print(f"\nNo reviews found for product {idx}")
                     skipped_urls.append({"url": url, "reason": "No Reviews", "product_id": result.get('product_id', 'UNKNOWN') if result else 'UNKNOWN'})
-                    if input_file:
+                    if url_queue:
                         result_id = result.get('product_id', 'UNKNOWN') if result else 'UNKNOWN'
-                        mark_url_as_completed(input_file, url, f"NO_REVIEWS_{result_id}")
+                        url_queue.mark_url_as_completed(url, f"NO_REVIEWS_{result_id}")
                     
             except Exception as e:
                 print(f"\nError scraping product {idx}: {e}")
@@ -990,169 +1437,162 @@ def main():
                 traceback.print_exc()
                 
                 skipped_urls.append({"url": url, "reason": f"Error: {str(e)[:50]}", "product_id": "ERROR"})
+                recycle = isinstance(e, WebDriverException)
                 
-                if input_file:
+                if url_queue:
                     print("\nMarking URL as completed despite error...")
-                    mark_url_as_completed(input_file, url, "ERROR")
+                    url_queue.mark_url_as_completed(url, "ERROR")
             
             finally:
-                print(f"Closing browser session for product {idx}...")
-                if scraper:
+                if scraper and not recycle:
+                    try:
+                        scraper.reset_context()
+                    except Exception as e:
+                        print(f"Could not reset browser context: {e}")
+                        recycle = True
+                
+                if scraper and recycle:
+                    print(f"Closing browser session for product {idx}...")
                     scraper.close()
                     scraper = None
-                time.sleep(1)
+                    time.sleep(1)
             
             if idx < len(urls):
                 delay = random.uniform(5, 8)
                 print(f"\nWaiting {delay:.1f}s before starting next product...")
-                time.sleep(delay)
+                deadline = time.monotonic() + delay
+                
+                # Use the anti-bot pause to get pending output onto disk
+                csv_file.flush()
+                os.fsync(csv_file.fileno())
+                writer.drain(max(0, deadline - time.monotonic()))
+                jsonl_file.flush()
+                os.fsync(jsonl_file.fileno())
+                
+                time.sleep(max(0, deadline - time.monotonic()))
+        
+        csv_file.close()
+        writer.close()
+        writer = None
+        jsonl_file.close()
         
-        if all_reviews_combined:
+        if stats["sentiment"]:
             print("\n" + "="*60)
             print("SAVING COMBINED RESULTS")
             print("="*60)
             
-            if input_file:
-                base_name = os.path.splitext(os.path.basename(input_file))[0]
-                combined_filename = f"walmart_reviews_{base_name}_combined_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            else:
-                combined_filename = f"walmart_reviews_combined_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            sentiment_codes = np.array(stats["sentiment"], dtype=np.int8)
+            confidences = np.array(stats["confidence"], dtype=np.float64)
+            scores = np.array(stats["score"], dtype=np.float64)
+            ratings = np.array(stats["rating"], dtype=np.float64)
+            
+            total = len(sentiment_codes)
+            # bincount over code+1: [unknown, negative, neutral, positive]
+            sentiment_counts = np.bincount(sentiment_codes + 1, minlength=4)
+            negative = int(sentiment_counts[1])
+            neutral = int(sentiment_counts[2])
+            positive = int(sentiment_counts[3])
             
-            positive = sum(1 for r in all_reviews_combined if r.get('sentiment') == 'positive')
-            negative = sum(1 for r in all_reviews_combined if r.get('sentiment') == 'negative')
-            neutral = sum(1 for r in all_reviews_combined if r.get('sentiment') == 'neutral')
+            confidences = confidences[~np.isnan(confidences)]
+            avg_confidence = float(confidences.mean()) if confidences.size else 0
             
-            all_confidences = [r.get('confidence', 0) for r in all_reviews_combined if r.get('confidence')]
-            avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0
+            scores = scores[~np.isnan(scores)]
+            avg_score = float(scores.mean()) if scores.size else 0
             
-            all_scores = [r.get('score', 0) for r in all_reviews_combined if r.get('score') is not None]
-            avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
+            has_rating = ~np.isnan(ratings)
             
-            combined_data = {
-                "metadata": {
-                    "source_file": input_file if input_file else "manual_input",
-                    "total_products": len(all_products_data),
-                    "total_reviews": len(all_reviews_combined),
-                    "positive_count": positive,
-                    "negative_count": negative,
-                    "neutral_count": neutral,
-                    "average_confidence": round(avg_confidence, 4),
-                    "average_score": round(avg_score, 4),
-                    "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
-                    "device": "GPU (CUDA)" if torch.cuda.is_available() else "CPU",
-                    "scraped_at": datetime.now().isoformat()
-                },
-                "products": all_products_data
+            metadata = {
+                "source_file": input_file if input_file else "manual_input",
+                "total_products": len(product_summaries),
+                "total_reviews": total,
+                "positive_count": positive,
+                "negative_count": negative,
+                "neutral_count": neutral,
+                "average_confidence": round(avg_confidence, 4),
+                "average_score": round(avg_score, 4),
+                "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
+                "device": "GPU (CUDA)" if torch.cuda.is_available() else "CPU",
+                "scraped_at": now_str()
             }
             
-            with open(f"{combined_filename}.json", 'w', encoding='utf-8') as f:
-                json.dump(combined_data, f, indent=2, ensure_ascii=False)
+            write_combined_json(f"{combined_filename}.json", metadata, jsonl_path)
             print(f"\nSaved combined data to {combined_filename}.json")
-            
-            with open(f"{combined_filename}.csv", 'w', newline='', encoding='utf-8') as f:
-                fieldnames = ['product_id', 'product_name', 'product_url', 'reviewer_name', 'rating', 
-                             'sentiment', 'confidence', 'score', 'roberta_label', 'method', 'title', 
-                             'review_text', 'date', 'verified_purchase', 'helpful_count']
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                writer.writeheader()
-                for review in all_reviews_combined:
-                    writer.writerow(review)
             print(f"Saved combined data to {combined_filename}.csv")
             
             print("\n" + "="*60)
             print("OVERALL SUMMARY")
             print("="*60)
-            print(f"Products Scraped: {len(all_products_data)}")
-            print(f"Total Reviews: {len(all_reviews_combined)}")
+            print(f"Products Scraped: {len(product_summaries)}")
+            print(f"Total Reviews: {total}")
             
             print(f"\nOverall Sentiment Distribution:")
-            print(f"  Positive: {positive:4d} ({positive/len(all_reviews_combined)*100:5.1f}%)")
-            print(f"  Negative: {negative:4d} ({negative/len(all_reviews_combined)*100:5.1f}%)")
-            print(f"  Neutral:  {neutral:4d} ({neutral/len(all_reviews_combined)*100:5.1f}%)")
+            print(f"  Positive: {positive:4d} ({positive/total*100:5.1f}%)")
+            print(f"  Negative: {negative:4d} ({negative/total*100:5.1f}%)")
+            print(f"  Neutral:  {neutral:4d} ({neutral/total*100:5.1f}%)")
             
             print(f"\nRoBERTa Sentiment Analysis:")
             print(f"  Average Confidence: {avg_confidence:.2%}")
             print(f"  Average Score: {avg_score:.4f} (0=negative, 0.5=neutral, 1=positive)")
             
-            if all_scores:
-                max_positive = max(all_scores)
-                max_negative = min(all_scores)
-                print(f"  Most Positive Score: {max_positive:.4f}")
-                print(f"  Most Negative Score: {max_negative:.4f}")
+            if scores.size:
+                print(f"  Most Positive Score: {scores.max():.4f}")
+                print(f"  Most Negative Score: {scores.min():.4f}")
             
-            methods = {}
-            for r in all_reviews_combined:
-                method = r.get('method', 'unknown')
-                methods[method] = methods.get(method, 0) + 1
+            methods = stats["methods"]
             
             print(f"\nSentiment Analysis Methods:")
-            for method, count in sorted(methods.items(), key=lambda x: x[1], reverse=True):
-                print(f"  {method}: {count} ({count/len(all_reviews_combined)*100:.1f}%)")
+            for method, count in methods.most_common():
+                print(f"  {method}: {count} ({count/total*100:.1f}%)")
             
-            ratings = [r['rating'] for r in all_reviews_combined if r.get('rating')]
-            if ratings:
-                avg_rating = sum(ratings) / len(ratings)
-                print(f"\nOverall Average Rating: {avg_rating:.2f} / 5.00")
+            if has_rating.any():
+                rated = ratings[has_rating]
+                print(f"\nOverall Average Rating: {rated.mean():.2f} / 5.00")
                 
-                verified = sum(1 for r in all_reviews_combined if r.get('verified_purchase'))
-                print(f"Total Verified Purchases: {verified} ({verified/len(all_reviews_combined)*100:.1f}%)")
+                verified = stats["verified"]
+                print(f"Total Verified Purchases: {verified} ({verified/total*100:.1f}%)")
+                
+                whole_stars = rated[(rated == np.floor(rated)) & (rated >= 1) & (rated <= 5)]
+                rating_hist = np.bincount(whole_stars.astype(np.int8), minlength=6)
                 
                 print(f"\nOverall Rating Distribution:")
                 for star in range(5, 0, -1):
-                    count = sum(1 for r in ratings if r == star)
-                    percentage = (count / len(ratings) * 100) if ratings else 0
+                    count = int(rating_hist[star])
+                    percentage = count / rated.size * 100
                     bar = "█" * int(percentage / 2)
                     print(f"  {star} stars: {count:4d} ({percentage:5.1f}%) {bar}")
-            
-            if ratings:
-                print(f"\nSentiment vs Rating Analysis:")
-                pos_ratings = [r['rating'] for r in all_reviews_combined if r.get('sentiment') == 'positive' and r.get('rating')]
-                neg_ratings = [r['rating'] for r in all_reviews_combined if r.get('sentiment') == 'negative' and r.get('rating')]
-                neu_ratings = [r['rating'] for r in all_reviews_combined if r.get('sentiment') == 'neutral' and r.get('rating')]
                 
-                if pos_ratings:
-                    print(f"  Positive sentiment avg rating: {sum(pos_ratings)/len(pos_ratings):.2f}")
-                if neg_ratings:
-                    print(f"  Negative sentiment avg rating: {sum(neg_ratings)/len(neg_ratings):.2f}")
-                if neu_ratings:
-                    print(f"  Neutral sentiment avg rating: {sum(neu_ratings)/len(neu_ratings):.2f}")
+                print(f"\nSentiment vs Rating Analysis:")
+                for sentiment in ('positive', 'negative', 'neutral'):
+                    sentiment_ratings = ratings[has_rating & (sentiment_codes == LABEL_CODES[sentiment])]
+                    if sentiment_ratings.size:
+                        print(f"  {sentiment.capitalize()} sentiment avg rating: {sentiment_ratings.mean():.2f}")
             
             print("\n" + "="*60)
             print("PER-PRODUCT SUMMARY")
             print("="*60)
-            for i, product in enumerate(all_products_data, 1):
-                reviews = product['reviews']
-                product_id = product['product_id']
-                print(f"\nProduct {i} (ID: {product_id}):")
-                print(f"  URL: {product['product_url'][:60]}...")
-                print(f"  Reviews: {len(reviews)}")
+            out = []
+            for i, product in enumerate(product_summaries, 1):
+                out.append(f"\nProduct {i} (ID: {product['product_id']}):")
+                out.append(f"  URL: {product['product_url'][:60]}...")
+                out.append(f"  Reviews: {product['reviews']}")
                 
-                if reviews:
-                    pos = sum(1 for r in reviews if r.get('sentiment') == 'positive')
-                    neg = sum(1 for r in reviews if r.get('sentiment') == 'negative')
-                    neu = sum(1 for r in reviews if r.get('sentiment') == 'neutral')
-                    print(f"  Sentiment: +{pos} / -{neg} / ={neu}")
-                    
-                    prod_ratings = [r['rating'] for r in reviews if r.get('rating')]
-                    if prod_ratings:
-                        prod_avg = sum(prod_ratings) / len(prod_ratings)
-                        print(f"  Avg Rating: {prod_avg:.2f}/5.00")
+                if product['reviews']:
+                    out.append(f"  Sentiment: +{product['positive']} / -{product['negative']} / ={product['neutral']}")
                     
-                    prod_confidences = [r.get('confidence', 0) for r in reviews if r.get('confidence')]
-                    prod_scores = [r.get('score', 0) for r in reviews if r.get('score') is not None]
+                    if product['avg_rating'] is not None:
+                        out.append(f"  Avg Rating: {product['avg_rating']:.2f}/5.00")
                     
-                    if prod_confidences:
-                        prod_avg_conf = sum(prod_confidences) / len(prod_confidences)
-                        print(f"  Avg Confidence: {prod_avg_conf:.2%}")
+                    if product['avg_confidence'] is not None:
+                        out.append(f"  Avg Confidence: {product['avg_confidence']:.2%}")
                     
-                    if prod_scores:
-                        prod_avg_score = sum(prod_scores) / len(prod_scores)
-                        print(f"  Avg Score: {prod_avg_score:.3f}")
+                    if product['avg_score'] is not None:
+                        out.append(f"  Avg Score: {product['avg_score']:.3f}")
+            sys.stdout.write("\n".join(out) + "\n")
             
             print("\n" + "="*60)
             print("SCRAPING COMPLETED SUCCESSFULLY!")
             print("="*60)
-            print(f"\nRoBERTa analyzed {len(all_reviews_combined)} reviews")
+            print(f"\nRoBERTa analyzed {total} reviews")
             print(f"Overall sentiment score: {avg_score:.4f} ", end="")
             if avg_score >= 0.6:
                 print("(Positive leaning)")
@@ -1181,6 +1621,9 @@ def main():
                     print(f"\n  ... and {len(skipped_urls) - 10} more")
         
         else:
+            for path in (f"{combined_filename}.csv", jsonl_path):
+                if os.path.exists(path):
+                    os.remove(path)
             print("\nNo reviews were collected from any products.")
             if input_file:
                 print(f"\nURLs have been marked as completed in {input_file.replace('.txt', '_completed.txt')}")
@@ -1200,6 +1643,8 @@ def main():
         print("\n\n" + "="*60)
         print("SCRAPING INTERRUPTED BY USER")
         print("="*60)
+        if url_queue:
+            url_queue.flush(force=True)
         if input_file:
             completed_file = input_file.replace('.txt', '_completed.txt')
             print(f"\nProgress saved!")
@@ -1212,6 +1657,8 @@ def main():
         import traceback
         traceback.print_exc()
         
+        if url_queue:
+            url_queue.flush(force=True)
         if input_file:
             print(f"\nProgress saved before crash!")
             print(f"  Remaining URLs: {input_file}")
@@ -1219,6 +1666,14 @@ def main():
             print(f"\nRestart the script to continue from where it stopped.")
     
     finally:
+        if writer:
+            writer.close()
+        if jsonl_file and not jsonl_file.closed:
+            jsonl_file.close()
+        if csv_file and not csv_file.closed:
+            csv_file.close()
+        if url_queue:
+            url_queue.close()
         if scraper:
             print("\nClosing final browser session...")
             scraper.close()
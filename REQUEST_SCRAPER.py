@@ -5,18 +5,168 @@ import re
 import random
 import os
 import glob
+import atexit
+import queue
+from collections import Counter
 from datetime import datetime
 from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 from curl_cffi import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
 import torch
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Sentiment models with the same negative/neutral/positive label set
+DEFAULT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+DISTILLED_MODEL = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+
+# Sentiment model used by main(). Set SENTIMENT_MODEL = DISTILLED_MODEL for a faster
+# 6-layer student, QUANTIZE_ON_CPU = True to int8-quantize it on CPU (slightly shifts
+# scores), and SENTIMENT_BACKEND = "onnx" to run it through ONNX Runtime
+SENTIMENT_MODEL = DEFAULT_MODEL
+QUANTIZE_ON_CPU = False
+SENTIMENT_BACKEND = "torch"
+
+# Reviews per forward pass; batches are formed after sorting by token length
+SENTIMENT_BATCH_SIZE = 32
+
+# RoBERTa label -> sentiment code (0=negative, 1=neutral, 2=positive)
+LABEL_CODES = {
+    'negative': 0, 'label_0': 0,
+    'neutral': 1, 'label_1': 1,
+    'positive': 2, 'label_2': 2
+}
+SENTIMENT_NAMES = ("negative", "neutral", "positive")
+
+# Review pages fetched concurrently per burst
+PAGE_CONCURRENCY = 4
+
+# Completed URLs are written back to the link files in batches
+COMPLETION_FLUSH_EVERY = 25
+PENDING_COMPLETIONS: Dict[str, List[tuple]] = {}
+
+# Pulls the __NEXT_DATA__ JSON straight out of the raw page bytes
+NEXT_DATA_RE = re.compile(rb'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S)
+
+# Start of the reviews array, plus a tokenizer for skipping JSON strings while matching brackets
+CUSTOMER_REVIEWS_RE = re.compile(rb'"customerReviews"\s*:\s*(\[)')
+JSON_SCAN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]]', re.S)
+
+# Fallback parse only builds the __NEXT_DATA__ script node
+NEXT_DATA_STRAINER = SoupStrainer('script', attrs={'id': '__NEXT_DATA__'})
+
+# Last numeric segment after /ip/ in a product URL
+PRODUCT_ID_RE = re.compile(r'/ip/(?:[^/]+/)?(\d+)')
+
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def score_from_ratings(ratings, out_sent, out_conf, out_score):
+        """Rating-fallback sentiment codes/confidence/score for an array of ratings (NaN = no rating)"""
+        for i in numba.prange(ratings.size):
+            r = ratings[i]
+            if np.isnan(r):
+                out_sent[i] = 1
+                out_conf[i] = 0.5
+                out_score[i] = 0.5
+            elif r >= 4:
+                out_sent[i] = 2
+                out_conf[i] = 0.8
+                out_score[i] = 0.8
+            elif r <= 2:
+                out_sent[i] = 0
+                out_conf[i] = 0.8
+                out_score[i] = 0.2
+            else:
+                out_sent[i] = 1
+                out_conf[i] = 0.7
+                out_score[i] = 0.5
+else:
+    def score_from_ratings(ratings, out_sent, out_conf, out_score):
+        """Rating-fallback sentiment codes/confidence/score for an array of ratings (NaN = no rating)"""
+        with np.errstate(invalid='ignore'):
+            pos = ratings >= 4
+            neg = ratings <= 2
+        out_sent[:] = np.where(pos, 2, np.where(neg, 0, 1))
+        out_conf[:] = np.where(np.isnan(ratings), 0.5, np.where(pos | neg, 0.8, 0.7))
+        out_score[:] = np.where(pos, 0.8, np.where(neg, 0.2, 0.5))
+
+
+def decode_json_array(raw: bytes, start: int) -> Optional[list]:
+    """Decode the JSON array opening at raw[start]; None if it is cut off or invalid"""
+    depth = 0
+    # String tokens are consumed whole, so brackets inside review text are ignored
+    for token in JSON_SCAN_RE.finditer(raw, start):
+        char = token.group()
+        if char == b'[':
+            depth += 1
+        elif char == b']':
+            depth -= 1
+            if depth == 0:
+                try:
+                    return json_loads(raw[start:token.end()])
+                except ValueError:
+                    return None
+    
+    return None
+
+
+def extract_customer_reviews(raw: bytes) -> Optional[list]:
+    """
+    Decode just the customerReviews array from a raw review page without
+    parsing the whole __NEXT_DATA__ payload. Other modules may carry a
+    "customerReviews" key too, so only a non-empty array of reviews (objects
+    with a reviewId) is accepted. Returns None when no such array can be
+    located or decoded, so callers fall back to the full parse.
+    """
+    for match in CUSTOMER_REVIEWS_RE.finditer(raw):
+        reviews = decode_json_array(raw, match.start(1))
+        if reviews and all(isinstance(review, dict) and 'reviewId' in review for review in reviews):
+            return reviews
+    
+    return None
+
+
+def json_loads(data):
+    """Parse JSON text/bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_json(path: str, data):
+    """Write indented JSON to path, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
 
 class WalmartRequestScraper:
-    def __init__(self):
-        """Initialize the Walmart Request Scraper with RoBERTa sentiment analysis"""
+    def __init__(self, model_name: str = SENTIMENT_MODEL, quantize: bool = QUANTIZE_ON_CPU,
+                 backend: str = SENTIMENT_BACKEND):
+        """
+        Initialize the Walmart Request Scraper with RoBERTa sentiment analysis.
+        Pass model_name=DISTILLED_MODEL for a 6-layer student model; quantize=True
+        dynamically quantizes the Linear layers to int8 on CPU (opt-in, since it
+        shifts scores slightly). backend="onnx" runs the model through ONNX Runtime
+        when optimum is installed.
+        """
         print("Initializing Request-based Scraper (No Browser)...")
         
         self.fingerprints = [
@@ -24,35 +174,44 @@ class WalmartRequestScraper:
             "safari15_3", "safari15_5", "edge101"
         ]
         
-        print("Loading CardiffNLP RoBERTa sentiment model...")
+        # Persistent sessions (one per concurrent fetch) keep TCP/TLS connections alive;
+        # the fingerprint is still chosen per request via impersonate=
+        self.sessions = queue.Queue()
+        for _ in range(PAGE_CONCURRENCY):
+            self.sessions.put(requests.Session())
+        
+        print(f"Loading sentiment model: {model_name}...")
         print("(This may take a moment on first run - downloading model...)")
         
-        model_name = "cardiffnlp/twitter-roberta-base-sentiment-latest"
         self.device = 0 if torch.cuda.is_available() else -1
         device_name = "GPU (CUDA)" if self.device == 0 else "CPU"
         print(f"Using device: {device_name}")
         
+        if self.device == -1:
+            # Some PyTorch builds default to fewer intra-op threads than available cores
+            torch.set_num_threads(os.cpu_count() or 1)
+        
+        # Stays None if loading fails, which switches to rating-based sentiment
+        self.model = None
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=self.device,
-                truncation=True,
-                max_length=512
-            )
+            if backend == "onnx":
+                self.model = self.load_onnx_model(model_name, quantize)
+            if self.model is None:
+                self.model = self.load_torch_model(model_name, quantize)
             
-            print(f"✓ RoBERTa sentiment model loaded successfully on {device_name}")
-            print("✓ Model: cardiffnlp/twitter-roberta-base-sentiment-latest")
+            print(f"✓ Sentiment model loaded successfully on {device_name}")
+            print(f"✓ Model: {model_name}")
             print("✓ Optimized for social media and review text")
             
         except Exception as e:
             print(f"Error loading RoBERTa model: {e}")
             print("Falling back to rating-based sentiment...")
-            self.sentiment_pipeline = None
+            self.model = None
+        
+        # Raw model output per analyzed text, so repeated reviews skip inference;
+        # cleared per product by scrape_reviews so it stays bounded over long runs
+        self._sent_cache: Dict[str, Dict] = {}
         
         print("Scraper initialized successfully (Request-based, no browser)")
         
@@ -63,105 +222,253 @@ class WalmartRequestScraper:
         os.makedirs("json_files/neutral", exist_ok=True)
         print("✓ Folders ready: json_files/positive, json_files/negative, json_files/neutral")
     
+    def load_torch_model(self, model_name: str, quantize: bool):
+        """Load the PyTorch model, int8-quantized on CPU or compiled otherwise"""
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        
+        if self.device == 0:
+            # Half precision on tensor cores; bf16 on Ampere+ avoids fp16 overflow
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            model = model.to(device="cuda", dtype=dtype)
+            print(f"✓ Model weights cast to {str(dtype).replace('torch.', '')}")
+        
+        if quantize and self.device == -1:
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            print("✓ Linear layers quantized to int8 (dynamic)")
+        elif hasattr(torch, 'compile'):
+            # Compile forward only, so the model keeps its PreTrainedModel attributes
+            eager_forward = model.forward
+            try:
+                model.forward = torch.compile(eager_forward, dynamic=True)
+                # Compilation is lazy; warm up now so failures surface here
+                warmup = self.tokenizer(["warm up"], return_tensors="pt")
+                if self.device == 0:
+                    model.to("cuda")
+                    warmup = warmup.to("cuda")
+                with torch.no_grad():
+                    model(**warmup)
+                print("✓ Model forward compiled with torch.compile")
+            except Exception as e:
+                model.forward = eager_forward
+                print(f"torch.compile unavailable, using eager mode: {e}")
+        
+        return model
+    
+    def load_onnx_model(self, model_name: str, quantize: bool):
+        """
+        Load an ONNX Runtime export of the model, exporting (and on CPU
+        int8-quantizing) it into models/ on first use. Returns None if
+        optimum/onnxruntime is not installed or the export fails.
+        """
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        except ImportError:
+            print("optimum[onnxruntime] not installed, using PyTorch backend")
+            return None
+        
+        provider = "CUDAExecutionProvider" if self.device == 0 else "CPUExecutionProvider"
+        export_dir = os.path.join("models", model_name.replace('/', '__'))
+        quantized_dir = f"{export_dir}_int8"
+        
+        try:
+            if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+                print(f"Exporting {model_name} to ONNX (first run only)...")
+                ort_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+                ort_model.save_pretrained(export_dir)
+                self.tokenizer.save_pretrained(export_dir)
+            
+            if quantize and self.device == -1:
+                if not os.path.exists(os.path.join(quantized_dir, "model_quantized.onnx")):
+                    print("Quantizing ONNX model to int8 (first run only)...")
+                    quantizer = ORTQuantizer.from_pretrained(export_dir)
+                    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                    quantizer.quantize(save_dir=quantized_dir, quantization_config=qconfig)
+                ort_model = ORTModelForSequenceClassification.from_pretrained(
+                    quantized_dir, file_name="model_quantized.onnx", provider=provider
+                )
+            else:
+                ort_model = ORTModelForSequenceClassification.from_pretrained(export_dir, provider=provider)
+            
+            print(f"✓ ONNX Runtime model ready ({provider})")
+            return ort_model
+            
+        except Exception as e:
+            print(f"ONNX export failed, using PyTorch backend: {e}")
+            return None
+    
     def human_delay(self, min_sec: float = 2.0, max_sec: float = 5.0):
         """Random delay to mimic human behavior"""
         time.sleep(random.uniform(min_sec, max_sec))
     
+    def rating_fallback_batch(self, ratings: List[Optional[float]]) -> List[Dict]:
+        """
+        Rating-based sentiment used when RoBERTa is unavailable or fails, for a
+        whole batch in one numeric pass
+        """
+        r = np.array([np.nan if x is None else x for x in ratings], dtype=np.float64)
+        codes = np.empty(r.size, dtype=np.int8)
+        confs = np.empty(r.size, dtype=np.float64)
+        scores = np.empty(r.size, dtype=np.float64)
+        score_from_ratings(r, codes, confs, scores)
+        
+        return [
+            {
+                "sentiment": SENTIMENT_NAMES[code],
+                "confidence": conf,
+                "score": score,
+                "method": "default" if rating is None else "rating_fallback"
+            }
+            for code, conf, score, rating in zip(codes.tolist(), confs.tolist(), scores.tolist(), ratings)
+        ]
+    
     def classify_sentiment(self, review_text: str, rating: Optional[float], title: str = "") -> Dict:
         """Classify review sentiment using RoBERTa"""
-        text_to_analyze = f"{title} {review_text}".strip()
-        
-        if not text_to_analyze:
-            return {
-                "sentiment": "neutral",
-                "confidence": 0.0,
-                "score": 0.0,
-                "method": "default"
-            }
+        return self.classify_sentiment_batch([review_text], [rating], [title])[0]
+    
+    def classify_sentiment_batch(self, review_texts: List[str], ratings: List[Optional[float]],
+                                 titles: List[str]) -> List[Dict]:
+        """Classify a batch of reviews with batched RoBERTa forward passes"""
+        results = [None] * len(review_texts)
+        texts = []
+        indices = []
+        fallback_indices = []
         
-        if self.sentiment_pipeline is None:
-            if rating is not None:
-                if rating >= 4:
-                    return {"sentiment": "positive", "confidence": 0.8, "score": 0.8, "method": "rating_fallback"}
-                elif rating <= 2:
-                    return {"sentiment": "negative", "confidence": 0.8, "score": 0.2, "method": "rating_fallback"}
-                else:
-                    return {"sentiment": "neutral", "confidence": 0.7, "score": 0.5, "method": "rating_fallback"}
+        for i, (review_text, rating, title) in enumerate(zip(review_texts, ratings, titles)):
+            text_to_analyze = f"{title} {review_text}".strip()
+            
+            if not text_to_analyze:
+                results[i] = {
+                    "sentiment": "neutral",
+                    "confidence": 0.0,
+                    "score": 0.0,
+                    "method": "default"
+                }
+            elif self.model is None:
+                fallback_indices.append(i)
             else:
-                return {"sentiment": "neutral", "confidence": 0.5, "score": 0.5, "method": "default"}
+                texts.append(text_to_analyze[:2000])
+                indices.append(i)
+        
+        if fallback_indices:
+            fallback = self.rating_fallback_batch([ratings[i] for i in fallback_indices])
+            for i, result in zip(fallback_indices, fallback):
+                results[i] = result
+        
+        if not texts:
+            return results
         
         try:
-            if len(text_to_analyze) > 2000:
-                text_to_analyze = text_to_analyze[:2000]
-            
-            result = self.sentiment_pipeline(text_to_analyze)[0]
-            raw_label = result['label'].lower()
-            
-            if raw_label in ['negative', 'label_0']:
-                sentiment = "negative"
-            elif raw_label in ['neutral', 'label_1']:
-                sentiment = "neutral"
-            elif raw_label in ['positive', 'label_2']:
-                sentiment = "positive"
-            else:
-                sentiment = "neutral"
-            
-            confidence = result['score']
+            misses = list(dict.fromkeys(t for t in texts if t not in self._sent_cache))
+            if misses:
+                outputs = self.run_model_batches(misses)
+                self._sent_cache.update(zip(misses, outputs))
             
-            if sentiment == "negative":
-                score = (1 - confidence) * 0.5
-            elif sentiment == "neutral":
-                score = 0.5
-            else:
-                score = 0.5 + (confidence * 0.5)
-            
-            method = "roberta"
-            
-            if rating is not None:
-                if (sentiment == "positive" and rating >= 4) or \
-                   (sentiment == "negative" and rating <= 2) or \
-                   (sentiment == "neutral" and rating == 3):
-                    confidence = min(confidence * 1.1, 1.0)
-                    method = "roberta_aligned"
-                elif confidence < 0.6:
-                    if rating >= 4 and sentiment != "positive":
-                        sentiment = "positive"
-                        confidence = 0.75
-                        score = 0.75
-                        method = "roberta_rating_adjusted"
-                    elif rating <= 2 and sentiment != "negative":
-                        sentiment = "negative"
-                        confidence = 0.75
-                        score = 0.25
-                        method = "roberta_rating_adjusted"
-            
-            return {
-                "sentiment": sentiment,
-                "confidence": round(confidence, 4),
-                "score": round(score, 4),
-                "roberta_label": result['label'],
-                "method": method
-            }
+            finalized = self.finalize_sentiment_batch(
+                [self._sent_cache[text] for text in texts],
+                [ratings[i] for i in indices]
+            )
+            for i, result in zip(indices, finalized):
+                results[i] = result
             
         except Exception as e:
             print(f"RoBERTa error: {e}")
-            if rating is not None:
-                if rating >= 4:
-                    return {"sentiment": "positive", "confidence": 0.8, "score": 0.8, "method": "rating_fallback"}
-                elif rating <= 2:
-                    return {"sentiment": "negative", "confidence": 0.8, "score": 0.2, "method": "rating_fallback"}
-                else:
-                    return {"sentiment": "neutral", "confidence": 0.7, "score": 0.5, "method": "rating_fallback"}
+            fallback = self.rating_fallback_batch([ratings[i] for i in indices])
+            for i, result in zip(indices, fallback):
+                results[i] = result
+        
+        return results
+    
+    def run_model_batches(self, texts: List[str]) -> List[Dict]:
+        """
+        Run the model directly on length-sorted batches so each batch is only
+        padded to its own longest review. Returns pipeline-style
+        {'label', 'score'} dicts in the original order.
+        """
+        encodings = self.tokenizer(texts, truncation=True, max_length=512, return_length=True)
+        order = sorted(range(len(texts)), key=encodings['length'].__getitem__)
+        id2label = self.model.config.id2label
+        device = getattr(self.model, 'device', 'cpu')
+        outputs = [None] * len(texts)
+        
+        with torch.inference_mode():
+            for start in range(0, len(order), SENTIMENT_BATCH_SIZE):
+                batch_idx = order[start:start + SENTIMENT_BATCH_SIZE]
+                batch = self.tokenizer.pad(
+                    [{'input_ids': encodings['input_ids'][j], 'attention_mask': encodings['attention_mask'][j]}
+                     for j in batch_idx],
+                    pad_to_multiple_of=8,
+                    return_tensors='pt'
+                ).to(device)
+                
+                probs = self.model(**batch).logits.float().softmax(dim=-1)
+                scores, labels = probs.max(dim=-1)
+                
+                for j, label, score in zip(batch_idx, labels.tolist(), scores.tolist()):
+                    outputs[j] = {'label': id2label[label], 'score': score}
+        
+        return outputs
+    
+    def finalize_sentiment_batch(self, outputs: List[Dict], ratings: List[Optional[float]]) -> List[Dict]:
+        """
+        Map raw RoBERTa predictions to sentiment/score and align them with the
+        star ratings, vectorized over the whole batch.
+        """
+        codes = np.array([LABEL_CODES.get(o['label'].lower(), 1) for o in outputs], dtype=np.int8)
+        confs = np.array([o['score'] for o in outputs], dtype=np.float64)
+        r = np.array([np.nan if x is None else x for x in ratings], dtype=np.float64)
+        
+        scores = np.where(codes == 0, (1 - confs) * 0.5,
+                          np.where(codes == 1, 0.5, 0.5 + confs * 0.5))
+        
+        with np.errstate(invalid='ignore'):
+            has_rating = ~np.isnan(r)
+            aligned = has_rating & (((codes == 2) & (r >= 4)) |
+                                    ((codes == 0) & (r <= 2)) |
+                                    ((codes == 1) & (r == 3)))
+            low = has_rating & ~aligned & (confs < 0.6)
+            to_positive = low & (r >= 4) & (codes != 2)
+            to_negative = low & (r <= 2) & (codes != 0)
+        adjusted = to_positive | to_negative
+        
+        confs = np.where(aligned, np.minimum(confs * 1.1, 1.0), confs)
+        confs[adjusted] = 0.75
+        scores[to_positive] = 0.75
+        scores[to_negative] = 0.25
+        codes[to_positive] = 2
+        codes[to_negative] = 0
+        
+        confs = np.round(confs, 4).tolist()
+        scores = np.round(scores, 4).tolist()
+        
+        results = []
+        for k, output in enumerate(outputs):
+            if adjusted[k]:
+                method = "roberta_rating_adjusted"
+            elif aligned[k]:
+                method = "roberta_aligned"
             else:
-                return {"sentiment": "neutral", "confidence": 0.5, "score": 0.5, "method": "default"}
+                method = "roberta"
+            results.append({
+                "sentiment": SENTIMENT_NAMES[codes[k]],
+                "confidence": confs[k],
+                "score": scores[k],
+                "roberta_label": output['label'],
+                "method": method
+            })
+        
+        return results
     
     def extract_product_id(self, url: str) -> Optional[str]:
         """Extract product ID from Walmart URL"""
         # Remove trailing slashes and query parameters
-        clean_url = url.split('?')[0].rstrip('/')
+        clean_url = url.split('?', 1)[0].rstrip('/')
         
         # Extract the last numeric segment after /ip/
-        match = re.search(r'/ip/(?:[^/]+/)?(\d+)', clean_url)
+        match = PRODUCT_ID_RE.search(clean_url)
         
         if match:
             product_id = match.group(1)
@@ -171,6 +478,32 @@ class WalmartRequestScraper:
         print(f"❌ Could not extract product ID from: {url}")
         return None
     
+    def fetch_page(self, target_url: str):
+        """Fetch one review page with a randomly chosen browser fingerprint"""
+        current_fingerprint = random.choice(self.fingerprints)
+        session = self.sessions.get()
+        try:
+            return session.get(target_url, impersonate=current_fingerprint, timeout=30)
+        except requests.exceptions.ConnectionError:
+            # Connection was reset - replace the session so the next fetch reconnects
+            session.close()
+            session = requests.Session()
+            raise
+        finally:
+            self.sessions.put(session)
+    
+    def close(self):
+        """Close the pooled HTTP sessions"""
+        while True:
+            try:
+                session = self.sessions.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                session.close()
+            except Exception as e:
+                print(f"Warning: Could not close session: {e}")
+    
     def scrape_reviews(self, url: str, product_name: str = None, max_reviews: int = 250) -> Dict:
         """
         Scrape all reviews from a Walmart product page using requests.
@@ -185,6 +518,7 @@ class WalmartRequestScraper:
             print(f"Product Name: {product_name}")
         
         base_reviews_url = f"https://www.walmart.com/reviews/product/{product_id}"
+        self._sent_cache.clear()
         all_reviews = []
         seen_ids = set()
         current_page = 1
@@ -197,116 +531,144 @@ class WalmartRequestScraper:
         
         print(f"\nCollecting reviews (Target: {max_reviews})...")
         
-        while len(all_reviews) < max_reviews and current_page <= max_possible_pages:
-            try:
-                target_url = f"{base_reviews_url}?page={current_page}&sort=submission-desc"
-                current_fingerprint = random.choice(self.fingerprints)
-                
-                print(f"Page {current_page}: Fetching... (collected {len(all_reviews)}/{max_reviews})")
+        stop = False
+        with ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY) as pool:
+            while not stop and len(all_reviews) < max_reviews and current_page <= max_possible_pages:
+                # Fetch a burst of pages concurrently, then process them in page order
+                burst_pages = list(range(current_page, min(current_page + PAGE_CONCURRENCY, max_possible_pages + 1)))
+                print(f"Pages {burst_pages[0]}-{burst_pages[-1]}: Fetching... (collected {len(all_reviews)}/{max_reviews})")
                 
-                with requests.Session() as session:
-                    response = session.get(target_url, impersonate=current_fingerprint, timeout=30)
+                futures = [
+                    pool.submit(self.fetch_page, f"{base_reviews_url}?page={page}&sort=submission-desc")
+                    for page in burst_pages
+                ]
+                burst_candidates = []
                 
-                if response.status_code != 200:
-                    print(f"⚠️ Page {current_page} failed with status {response.status_code}")
-                    consecutive_failures += 1
-                    
-                    if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                        print(f"❌ Too many consecutive failures ({consecutive_failures}). Stopping.")
-                        break
-                    
-                    current_page += 1
-                    time.sleep(random.uniform(3, 5))
-                    continue
-                
-                consecutive_failures = 0
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                script_tag = soup.find('script', {'id': '__NEXT_DATA__'})
-                
-                if not script_tag:
-                    print(f"⚠️ No data script found on page {current_page}")
-                    consecutive_empty_pages += 1
-                    
-                    if consecutive_empty_pages >= MAX_EMPTY_PAGES:
-                        print(f"❌ Too many pages without data ({consecutive_empty_pages}). Stopping.")
-                        break
-                    
-                    current_page += 1
-                    time.sleep(random.uniform(2, 4))
-                    continue
-                
-                try:
-                    data = json.loads(script_tag.string)
-                except json.JSONDecodeError as e:
-                    print(f"⚠️ JSON parsing error on page {current_page}: {e}")
-                    consecutive_empty_pages += 1
-                    
-                    if consecutive_empty_pages >= MAX_EMPTY_PAGES:
+                for current_page, future in zip(burst_pages, futures):
+                    if len(all_reviews) + len(burst_candidates) >= max_reviews:
                         break
                     
-                    current_page += 1
-                    time.sleep(random.uniform(2, 4))
-                    continue
+                    try:
+                        response = future.result()
+                        
+                        if response.status_code != 200:
+                            print(f"⚠️ Page {current_page} failed with status {response.status_code}")
+                            consecutive_failures += 1
+                            
+                            if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                                print(f"❌ Too many consecutive failures ({consecutive_failures}). Stopping.")
+                                stop = True
+                                break
+                            continue
+                        
+                        consecutive_failures = 0
+                        
+                        # Fast path: decode only the customerReviews array from the raw bytes
+                        page_reviews_raw = extract_customer_reviews(response.content)
+                        
+                        if page_reviews_raw is None:
+                            match = NEXT_DATA_RE.search(response.content)
+                            if match:
+                                next_data = match.group(1)
+                            else:
+                                soup = BeautifulSoup(response.content, 'lxml', parse_only=NEXT_DATA_STRAINER)
+                                script_tag = soup.find('script')
+                                next_data = script_tag.string if script_tag else None
+                            
+                            if not next_data:
+                                print(f"⚠️ No data script found on page {current_page}")
+                                consecutive_empty_pages += 1
+                            
+                                if consecutive_empty_pages >= MAX_EMPTY_PAGES:
+                                    print(f"❌ Too many pages without data ({consecutive_empty_pages}). Stopping.")
+                                    stop = True
+                                    break
+                                continue
+                            
+                            try:
+                                data = json_loads(next_data)
+                            except json.JSONDecodeError as e:
+                                print(f"⚠️ JSON parsing error on page {current_page}: {e}")
+                                consecutive_empty_pages += 1
+                            
+                                if consecutive_empty_pages >= MAX_EMPTY_PAGES:
+                                    stop = True
+                                    break
+                                continue
+                            
+                            reviews_data = {}
+                            try:
+                                initial_data = data.get('props', {}).get('pageProps', {}).get('initialData', {}).get('data', {})
+                                reviews_data = initial_data.get('reviews', {})
+                            except Exception as e:
+                                print(f"⚠️ Error parsing review structure on page {current_page}: {e}")
+                                consecutive_empty_pages += 1
+                            
+                                if consecutive_empty_pages >= MAX_EMPTY_PAGES:
+                                    stop = True
+                                    break
+                                continue
+                            
+                            page_reviews_raw = reviews_data.get('customerReviews', [])
+                        
+                        if not page_reviews_raw:
+                            print(f"⚠️ No reviews found on page {current_page}")
+                            consecutive_empty_pages += 1
+                            
+                            if consecutive_empty_pages >= MAX_EMPTY_PAGES:
+                                print(f"❌ No more reviews available after {consecutive_empty_pages} empty pages.")
+                                stop = True
+                                break
+                            continue
+                        
+                        # Unseen reviews with text, keyed by ID so in-page repeats collapse
+                        remaining = max_reviews - len(all_reviews) - len(burst_candidates)
+                        page_candidates = list({
+                            review_id: raw_review
+                            for raw_review in page_reviews_raw
+                            if (review_id := raw_review.get('reviewId')) not in seen_ids
+                            and len(raw_review.get('reviewText') or '') >= 3
+                        }.values())[:remaining]
+                        
+                        seen_ids.update(r.get('reviewId') for r in page_candidates)
+                        burst_candidates.extend(page_candidates)
+                        new_reviews_found_on_page = len(page_candidates)
+                        
+                        if new_reviews_found_on_page > 0:
+                            consecutive_empty_pages = 0
+                            print(f"✓ Found {new_reviews_found_on_page} new reviews on page {current_page}")
+                        else:
+                            consecutive_empty_pages += 1
+                            print(f"⚠️ Page {current_page} yielded 0 new reviews (all duplicates)")
+                        
+                    except requests.exceptions.Timeout:
+                        print(f"⚠️ Timeout on page {current_page}")
+                        consecutive_failures += 1
+                        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                            stop = True
+                            break
+                        
+                    except Exception as e:
+                        print(f"⚠️ Unexpected error on page {current_page}: {e}")
+                        consecutive_failures += 1
+                        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                            print(f"❌ Too many errors. Stopping.")
+                            stop = True
+                            break
                 
-                reviews_data = {}
-                try:
-                    initial_data = data.get('props', {}).get('pageProps', {}).get('initialData', {}).get('data', {})
-                    reviews_data = initial_data.get('reviews', {})
-                except Exception as e:
-                    print(f"⚠️ Error parsing review structure on page {current_page}: {e}")
-                    consecutive_empty_pages += 1
-                    
-                    if consecutive_empty_pages >= MAX_EMPTY_PAGES:
-                        break
-                    
-                    current_page += 1
-                    time.sleep(random.uniform(2, 4))
-                    continue
-
-                page_reviews_raw = reviews_data.get('customerReviews', [])
+                # RoBERTa sentiment analysis for the whole burst in one batch
+                sentiment_results = self.classify_sentiment_batch(
+                    [r.get('reviewText', '') for r in burst_candidates],
+                    [r.get('rating') for r in burst_candidates],
+                    [r.get('reviewTitle', '') for r in burst_candidates]
+                )
                 
-                if not page_reviews_raw:
-                    print(f"⚠️ No reviews found on page {current_page}")
-                    consecutive_empty_pages += 1
-                    
-                    if consecutive_empty_pages >= MAX_EMPTY_PAGES:
-                        print(f"❌ No more reviews available after {consecutive_empty_pages} empty pages.")
-                        break
-                    
-                    current_page += 1
-                    time.sleep(random.uniform(2, 4))
-                    continue
-
-                new_reviews_found_on_page = 0
-
-                for raw_review in page_reviews_raw:
-                    if len(all_reviews) >= max_reviews:
-                        break
-
-                    review_id = raw_review.get('reviewId')
-                    
-                    if review_id in seen_ids:
-                        continue
-                    seen_ids.add(review_id)
-
-                    review_text = raw_review.get('reviewText', '')
-                    title = raw_review.get('reviewTitle', '')
-                    
-                    if not review_text or len(review_text) < 3:
-                        continue
-                    
-                    # Extract rating
-                    rating = raw_review.get('rating')
-                    
-                    # RoBERTa sentiment analysis
-                    sentiment_result = self.classify_sentiment(review_text, rating, title)
-                    
+                for raw_review, sentiment_result in zip(burst_candidates, sentiment_results):
                     clean_review = {
                         "reviewer_name": raw_review.get('userNickname', 'Anonymous'),
-                        "rating": rating,
-                        "title": title,
-                        "review_text": review_text,
+                        "rating": raw_review.get('rating'),
+                        "title": raw_review.get('reviewTitle', ''),
+                        "review_text": raw_review.get('reviewText', ''),
                         "date": raw_review.get('reviewSubmissionTime'),
                         "verified_purchase": any(b.get('id') == 'VerifiedPurchaser' 
                                                 for b in raw_review.get('badges', [])),
@@ -318,34 +680,10 @@ class WalmartRequestScraper:
                         "method": sentiment_result['method']
                     }
                     all_reviews.append(clean_review)
-                    new_reviews_found_on_page += 1
-                
-                if new_reviews_found_on_page > 0:
-                    consecutive_empty_pages = 0
-                    print(f"✓ Found {new_reviews_found_on_page} new reviews on page {current_page}")
-                else:
-                    consecutive_empty_pages += 1
-                    print(f"⚠️ Page {current_page} yielded 0 new reviews (all duplicates)")
                 
-                current_page += 1
-                time.sleep(random.uniform(2, 4))
-                
-            except requests.exceptions.Timeout:
-                print(f"⚠️ Timeout on page {current_page}")
-                consecutive_failures += 1
-                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                    break
-                current_page += 1
-                time.sleep(random.uniform(3, 5))
-                
-            except Exception as e:
-                print(f"⚠️ Unexpected error on page {current_page}: {e}")
-                consecutive_failures += 1
-                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                    print(f"❌ Too many errors. Stopping.")
-                    break
-                current_page += 1
-                time.sleep(random.uniform(2, 4))
+                current_page = burst_pages[-1] + 1
+                if not stop:
+                    time.sleep(random.uniform(2, 4))
         
         if not all_reviews:
             raise ValueError("No reviews found. Please try again.")
@@ -395,35 +733,52 @@ def find_all_link_files(folder_path: str) -> List[str]:
 
 
 def mark_url_as_completed(txt_file: str, completed_url: str, product_id: str = None):
-    """Remove completed URL from original file and add it to completed file"""
-    try:
-        if not os.path.exists(txt_file):
-            return
-        
-        with open(txt_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        remaining_lines = []
-        for line in lines:
-            if line.strip() and completed_url not in line:
-                remaining_lines.append(line)
-        
-        with open(txt_file, 'w', encoding='utf-8') as f:
-            f.writelines(remaining_lines)
-        
-        completed_file = txt_file.replace('.txt', '_completed.txt')
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        with open(completed_file, 'a', encoding='utf-8') as f:
-            if product_id:
-                f.write(f"{completed_url} # Completed at {timestamp} | Product ID: {product_id}\n")
-            else:
-                f.write(f"{completed_url} # Completed at {timestamp}\n")
-        
-        print(f"✓ Marked as completed")
+    """Queue a completed URL; the link files are updated in bulk by flush_completed_urls"""
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    pending = PENDING_COMPLETIONS.setdefault(txt_file, [])
+    pending.append((completed_url, product_id, timestamp))
+    print(f"✓ Marked as completed")
+    
+    if len(pending) >= COMPLETION_FLUSH_EVERY:
+        flush_completed_urls(txt_file)
+
+
+def flush_completed_urls(txt_file: str = None):
+    """Remove queued URLs from their link file and append them to the completed file.
+    Each file is read and written once per flush instead of once per URL."""
+    files = [txt_file] if txt_file else list(PENDING_COMPLETIONS)
+    
+    for path in files:
+        pending = PENDING_COMPLETIONS.pop(path, None)
+        if not pending:
+            continue
         
-    except Exception as e:
-        print(f"Warning: Could not update URL files: {e}")
+        try:
+            if not os.path.exists(path):
+                continue
+            
+            done = {url for url, _, _ in pending}
+            
+            with open(path, 'r', encoding='utf-8') as f:
+                remaining_lines = [line for line in f if line.strip() and line.strip() not in done]
+            
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(remaining_lines)
+            
+            completed_file = path.replace('.txt', '_completed.txt')
+            
+            with open(completed_file, 'a', encoding='utf-8') as f:
+                f.writelines(
+                    f"{url} # Completed at {timestamp} | Product ID: {product_id}\n" if product_id
+                    else f"{url} # Completed at {timestamp}\n"
+                    for url, product_id, timestamp in pending
+                )
+            
+        except Exception as e:
+            print(f"Warning: Could not update URL files: {e}")
+
+
+atexit.register(flush_completed_urls)
 
 
 def main():
@@ -432,7 +787,7 @@ def main():
     print("\n" + "="*60)
     print("WALMART BATCH FOLDER SCRAPER - RoBERTa SENTIMENT")
     print("="*60)
-    print("\nUsing CardiffNLP Twitter-RoBERTa Model")
+    print(f"\nUsing sentiment model: {SENTIMENT_MODEL}")
     print("✓ Scrapes all link files in a folder")
     print("✓ Auto-resume support")
     print("✓ GPU-accelerated (if CUDA available)")
@@ -522,24 +877,30 @@ def main():
                                 
                                 unique_reviews = []
                                 seen = set()
+                                sentiment_counts = Counter()
+                                product_context = {
+                                    'product_id': result['product_id'],
+                                    'product_url': result['product_url'],
+                                    'product_name': result.get('product_name', f"Product {result['product_id']}")
+                                }
                                 
+                                # Dedup and count sentiments in a single pass
                                 for review in reviews:
                                     key = review.get('review_text', '')
                                     if key and key not in seen and len(key) > 10:
                                         seen.add(key)
-                                        review['product_id'] = result['product_id']
-                                        review['product_url'] = result['product_url']
-                                        review['product_name'] = result.get('product_name', f"Product {result['product_id']}")
+                                        review.update(product_context)
                                         unique_reviews.append(review)
+                                        sentiment_counts[review.get('sentiment')] += 1
                                 
                                 result['reviews'] = unique_reviews
                                 all_products_data.append(result)
                                 all_reviews_combined.extend(unique_reviews)
                                 
                                 # Calculate dominant sentiment
-                                positive_count = sum(1 for r in unique_reviews if r.get('sentiment') == 'positive')
-                                negative_count = sum(1 for r in unique_reviews if r.get('sentiment') == 'negative')
-                                neutral_count = sum(1 for r in unique_reviews if r.get('sentiment') == 'neutral')
+                                positive_count = sentiment_counts['positive']
+                                negative_count = sentiment_counts['negative']
+                                neutral_count = sentiment_counts['neutral']
                                 
                                 # Determine dominant sentiment
                                 max_count = max(positive_count, negative_count, neutral_count)
@@ -557,8 +918,7 @@ def main():
                                 product_id = result['product_id']
                                 product_json_file = os.path.join(sentiment_folder, f"product_{product_id}.json")
                                 
-                                with open(product_json_file, 'w', encoding='utf-8') as f:
-                                    json.dump(result, f, indent=2, ensure_ascii=False)
+                                write_json(product_json_file, result)
                                 
                                 print(f"\n✓ Collected {len(unique_reviews)} reviews")
                                 print(f"✓ Dominant sentiment: {dominant_sentiment.upper()}")
@@ -583,6 +943,8 @@ def main():
                             print(f"\nWaiting {delay:.1f}s before next product...")
                             time.sleep(delay)
                     
+                    flush_completed_urls(txt_file)
+                    
                     # Save results for this file
                     if all_reviews_combined:
                         base_name = os.path.splitext(filename)[0]
@@ -598,17 +960,19 @@ def main():
                             "products": all_products_data
                         }
                         
-                        with open(f"{combined_filename}.json", 'w', encoding='utf-8') as f:
-                            json.dump(combined_data, f, indent=2, ensure_ascii=False)
+                        write_json(f"{combined_filename}.json", combined_data)
                         
-                        with open(f"{combined_filename}.csv", 'w', newline='', encoding='utf-8') as f:
+                        with open(f"{combined_filename}.csv", 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
                             fieldnames = ['product_id', 'product_name', 'product_url', 'reviewer_name', 'rating', 
                                          'sentiment', 'confidence', 'score', 'roberta_label', 'method', 'title', 
                                          'review_text', 'date', 'verified_purchase', 'helpful_count']
-                            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                            writer.writeheader()
-                            for review in all_reviews_combined:
-                                writer.writerow(review)
+                            writer = csv.writer(f)
+                            writer.writerow(fieldnames)
+                            # Plain rows in one writerows call skip DictWriter's per-row dict handling
+                            writer.writerows(
+                                [review.get(field, '') for field in fieldnames]
+                                for review in all_reviews_combined
+                            )
                         
                         print(f"\n✓ Saved: {combined_filename}.json and .csv")
                         print(f"  Products: {len(all_products_data)}")
@@ -667,9 +1031,10 @@ def main():
             
             # Calculate dominant sentiment
             reviews = result.get('reviews', [])
-            positive_count = sum(1 for r in reviews if r.get('sentiment') == 'positive')
-            negative_count = sum(1 for r in reviews if r.get('sentiment') == 'negative')
-            neutral_count = sum(1 for r in reviews if r.get('sentiment') == 'neutral')
+            sentiment_counts = Counter(r.get('sentiment') for r in reviews)
+            positive_count = sentiment_counts['positive']
+            negative_count = sentiment_counts['negative']
+            neutral_count = sentiment_counts['neutral']
             
             max_count = max(positive_count, negative_count, neutral_count)
             if positive_count == max_count:
@@ -686,8 +1051,7 @@ def main():
             product_id = result['product_id']
             filename = os.path.join(sentiment_folder, f"product_{product_id}.json")
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            write_json(filename, result)
             
             print(f"\n✓ Dominant sentiment: {dominant_sentiment.upper()}")
             print(f"✓ Saved to {filename}")
@@ -697,6 +1061,7 @@ def main():
             return
     
     except KeyboardInterrupt:
+        flush_completed_urls()
         print("\n\n" + "="*60)
         print("INTERRUPTED BY USER")
         print("="*60)
@@ -705,6 +1070,9 @@ def main():
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if scraper:
+            scraper.close()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,187 @@
 import json
+import numpy as np
 import torch
+from torch.utils.data import Dataset, DataLoader
+from functools import partial
+from collections import defaultdict
 from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import csv
 from tqdm import tqdm
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Sequence-length buckets batches are padded to on CUDA, so each shape can reuse a captured graph
+SEQ_BUCKETS = (32, 64, 128, 256, 512)
+
+# RoBERTa label -> sentiment code (0=negative, 1=neutral, 2=positive)
+LABEL_CODES = {
+    'negative': 0, 'label_0': 0,
+    'neutral': 1, 'label_1': 1,
+    'positive': 2, 'label_2': 2
+}
+SENTIMENT_NAMES = ("negative", "neutral", "positive")
+
+# Method codes written by finalize_sentiment_arrays
+METHOD_NAMES = ("roberta", "roberta_aligned", "roberta_rating_adjusted", "rating_fallback", "default")
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def finalize_sentiment_arrays(codes, confs, ratings, has_model, out_sent, out_conf, out_score, out_method):
+        """
+        Final sentiment code, confidence, score and method code per review.
+        ratings uses NaN for "no rating"; has_model is False where the model gave no prediction.
+        """
+        for i in numba.prange(codes.size):
+            r = ratings[i]
+            has_rating = not np.isnan(r)
+            
+            if not has_model[i]:
+                if not has_rating:
+                    out_sent[i] = 1
+                    out_conf[i] = 0.5
+                    out_score[i] = 0.5
+                    out_method[i] = 4
+                elif r >= 4:
+                    out_sent[i] = 2
+                    out_conf[i] = 0.8
+                    out_score[i] = 0.8
+                    out_method[i] = 3
+                elif r <= 2:
+                    out_sent[i] = 0
+                    out_conf[i] = 0.8
+                    out_score[i] = 0.2
+                    out_method[i] = 3
+                else:
+                    out_sent[i] = 1
+                    out_conf[i] = 0.7
+                    out_score[i] = 0.5
+                    out_method[i] = 3
+                continue
+            
+            code = codes[i]
+            conf = confs[i]
+            if code == 0:
+                score = (1 - conf) * 0.5
+            elif code == 1:
+                score = 0.5
+            else:
+                score = 0.5 + conf * 0.5
+            method = 0
+            
+            if has_rating:
+                if (code == 2 and r >= 4) or (code == 0 and r <= 2) or (code == 1 and r == 3):
+                    conf = min(conf * 1.1, 1.0)
+                    method = 1
+                elif conf < 0.6:
+                    if r >= 4 and code != 2:
+                        code = 2
+                        conf = 0.75
+                        score = 0.75
+                        method = 2
+                    elif r <= 2 and code != 0:
+                        code = 0
+                        conf = 0.75
+                        score = 0.25
+                        method = 2
+            
+            out_sent[i] = code
+            out_conf[i] = conf
+            out_score[i] = score
+            out_method[i] = method
+else:
+    def finalize_sentiment_arrays(codes, confs, ratings, has_model, out_sent, out_conf, out_score, out_method):
+        """
+        Final sentiment code, confidence, score and method code per review.
+        ratings uses NaN for "no rating"; has_model is False where the model gave no prediction.
+        """
+        scores = np.where(codes == 0, (1 - confs) * 0.5,
+                          np.where(codes == 1, 0.5, 0.5 + confs * 0.5))
+        codes = codes.copy()
+        
+        with np.errstate(invalid='ignore'):
+            has_rating = ~np.isnan(ratings)
+            high = has_rating & (ratings >= 4)
+            low_rating = has_rating & (ratings <= 2)
+            
+            # Rating alignment / low-confidence override for model predictions
+            aligned = has_model & (((codes == 2) & high) |
+                                   ((codes == 0) & low_rating) |
+                                   ((codes == 1) & (ratings == 3)))
+            unsure = has_model & has_rating & ~aligned & (confs < 0.6)
+            to_positive = unsure & high & (codes != 2)
+            to_negative = unsure & low_rating & (codes != 0)
+        adjusted = to_positive | to_negative
+        
+        confs = np.where(aligned, np.minimum(confs * 1.1, 1.0), confs)
+        confs[adjusted] = 0.75
+        scores[to_positive] = 0.75
+        scores[to_negative] = 0.25
+        codes[to_positive] = 2
+        codes[to_negative] = 0
+        methods = np.where(adjusted, 2, np.where(aligned, 1, 0))
+        
+        # Rating-based fallback where the model gave no prediction
+        fallback = ~has_model
+        codes[fallback] = np.where(high, 2, np.where(low_rating, 0, 1))[fallback]
+        confs[fallback] = np.where(has_rating, np.where(high | low_rating, 0.8, 0.7), 0.5)[fallback]
+        scores[fallback] = np.where(high, 0.8, np.where(low_rating, 0.2, 0.5))[fallback]
+        methods[fallback] = np.where(has_rating, 3, 4)[fallback]
+        
+        out_sent[:] = codes
+        out_conf[:] = confs
+        out_score[:] = scores
+        out_method[:] = methods
+
+
+def write_json(path: str, data):
+    """Write indented JSON to path, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+class ReviewEncodingDataset(Dataset):
+    """Pre-tokenized reviews served in a given (length-sorted) order"""
+    
+    def __init__(self, encodings: Dict, order: List[int]):
+        self.input_ids = encodings['input_ids']
+        self.attention_mask = encodings['attention_mask']
+        self.order = order
+    
+    def __len__(self):
+        return len(self.order)
+    
+    def __getitem__(self, i):
+        j = self.order[i]
+        return {'input_ids': self.input_ids[j], 'attention_mask': self.attention_mask[j]}
+
+
+class BucketCollator:
+    """Pad a batch of encodings up to the smallest SEQ_BUCKETS length that fits it"""
+    
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+    
+    def __call__(self, features: List[Dict]):
+        longest = max(len(f['input_ids']) for f in features)
+        length = next((b for b in SEQ_BUCKETS if b >= longest), SEQ_BUCKETS[-1])
+        return self.tokenizer.pad(features, padding='max_length', max_length=length, return_tensors='pt')
+
 
 class ReviewConverter:
     def __init__(self):
@@ -18,9 +194,15 @@ class ReviewConverter:
         device_name = "GPU (CUDA)" if self.device == 0 else "CPU"
         print(f"Using device: {device_name}")
         
+        # Captured CUDA graphs keyed by (batch_size, seq_len), all allocating from one
+        # shared memory pool (created on first capture) instead of a pool per graph
+        self.use_cuda_graphs = self.device == 0
+        self._graphs = {}
+        self._graph_pool = None
+        
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            self.model = self.load_model(model_name)
             
             self.sentiment_pipeline = pipeline(
                 "sentiment-analysis",
@@ -40,6 +222,86 @@ class ReviewConverter:
             print("Falling back to rating-based sentiment...\n")
             self.sentiment_pipeline = None
     
+    def load_model(self, model_name: str):
+        """Load the RoBERTa model: half precision and compiled on CUDA, int8-quantized on CPU"""
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        
+        if self.device == 0:
+            # Half precision halves weight/activation traffic; bf16 on Ampere+ avoids fp16 overflow
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            model = model.to(device="cuda", dtype=dtype)
+            print(f"✓ Model weights cast to {str(dtype).replace('torch.', '')}")
+        
+        if self.device == -1:
+            # int8 Linear layers (VNNI dot products on recent CPUs), activations quantized on the fly
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            print("✓ Linear layers quantized to int8 (dynamic)")
+        elif hasattr(torch, 'compile'):
+            # Compile forward only, so the pipeline still sees a PreTrainedModel
+            eager_forward = model.forward
+            try:
+                model.forward = torch.compile(eager_forward, dynamic=True)
+                # Compilation is lazy; run one batch now so failures surface here
+                warmup = self.tokenizer(["warm up"], return_tensors="pt").to(model.device)
+                with torch.inference_mode():
+                    model(**warmup)
+                print("✓ Model forward compiled with torch.compile")
+            except Exception as e:
+                model.forward = eager_forward
+                print(f"torch.compile unavailable, using eager mode: {e}")
+        
+        return model
+    
+    def graphed_logits(self, input_ids: torch.Tensor, attention_mask: torch.Tensor,
+                       batch_size: int) -> torch.Tensor:
+        """
+        Run the model forward through a CUDA graph captured for this input shape,
+        capturing it on first use. Only full batches of batch_size are graphed, so
+        there is one graph per sequence bucket; the tail batch and failed captures
+        use a normal forward.
+        """
+        if not self.use_cuda_graphs or input_ids.shape[0] != batch_size:
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        
+        key = tuple(input_ids.shape)
+        entry = self._graphs.get(key)
+        
+        if entry is None:
+            try:
+                static_ids = input_ids.clone()
+                static_mask = attention_mask.clone()
+                
+                # Warm up on a side stream before capture, as torch.cuda.graph requires
+                stream = torch.cuda.Stream()
+                stream.wait_stream(torch.cuda.current_stream())
+                with torch.cuda.stream(stream):
+                    for _ in range(2):
+                        self.model(input_ids=static_ids, attention_mask=static_mask)
+                torch.cuda.current_stream().wait_stream(stream)
+                
+                if self._graph_pool is None:
+                    self._graph_pool = torch.cuda.graph_pool_handle()
+                graph = torch.cuda.CUDAGraph()
+                with torch.cuda.graph(graph, pool=self._graph_pool):
+                    static_logits = self.model(input_ids=static_ids, attention_mask=static_mask).logits
+                
+                entry = self._graphs[key] = (graph, static_ids, static_mask, static_logits)
+            except Exception as e:
+                print(f"CUDA graph capture unavailable, using regular forward: {e}")
+                self.use_cuda_graphs = False
+                self._graphs.clear()
+                self._graph_pool = None
+                return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        
+        graph, static_ids, static_mask, static_logits = entry
+        static_ids.copy_(input_ids)
+        static_mask.copy_(attention_mask)
+        graph.replay()
+        return static_logits.clone()
+    
     def classify_sentiment(self, review_text: str, rating: Optional[float], title: str = "") -> Dict:
         """Classify review sentiment using RoBERTa (same logic as MULTILINK_SCRAPER)"""
         text_to_analyze = f"{title} {review_text}".strip()
@@ -71,17 +333,8 @@ class ReviewConverter:
             
             # Get RoBERTa prediction
             result = self.sentiment_pipeline(text_to_analyze)[0]
-            raw_label = result['label'].lower()
-            
-            # Map labels to sentiment
-            if raw_label in ['negative', 'label_0']:
-                sentiment = "negative"
-            elif raw_label in ['neutral', 'label_1']:
-                sentiment = "neutral"
-            elif raw_label in ['positive', 'label_2']:
-                sentiment = "positive"
-            else:
-                sentiment = "neutral"
+            # Map labels to sentiment (unknown labels count as neutral)
+            sentiment = SENTIMENT_NAMES[LABEL_CODES.get(result['label'].lower(), 1)]
             
             confidence = result['score']
             
@@ -136,81 +389,62 @@ class ReviewConverter:
             else:
                 return {"sentiment": "neutral", "confidence": 0.5, "score": 0.5, "method": "default"}
     
+    def finalize_sentiment_batch(self, sentiment_results: List[Optional[Dict]],
+                                 ratings: List[Optional[float]]) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+        """
+        Map raw RoBERTa predictions to sentiment/score and align them with the
+        ratings in one vectorized pass. Entries without a prediction (None) get
+        the rating-based fallback. Returns the result dicts and the same results
+        as columns (sentiment, confidence, score, rating, method arrays).
+        """
+        has_model = np.array([r is not None for r in sentiment_results], dtype=np.bool_)
+        codes = np.array([LABEL_CODES.get(r['label'].lower(), 1) if r is not None else 1
+                          for r in sentiment_results], dtype=np.int8)
+        confs = np.array([r['score'] if r is not None else 0.0 for r in sentiment_results], dtype=np.float64)
+        r = np.array([np.nan if x is None else x for x in ratings], dtype=np.float64)
+        
+        n = len(sentiment_results)
+        out_sent = np.empty(n, dtype=np.int8)
+        out_conf = np.empty(n, dtype=np.float64)
+        out_score = np.empty(n, dtype=np.float64)
+        out_method = np.empty(n, dtype=np.int8)
+        finalize_sentiment_arrays(codes, confs, r, has_model, out_sent, out_conf, out_score, out_method)
+        
+        out_conf = np.round(out_conf, 4)
+        out_score = np.round(out_score, 4)
+        
+        # Column (SoA) copy of the results for array-based statistics in convert_file
+        cols = {
+            'sentiment': out_sent,
+            'confidence': out_conf,
+            'score': out_score,
+            'rating': r,
+            'method': out_method
+        }
+        
+        confs = out_conf.tolist()
+        scores = out_score.tolist()
+        
+        results = []
+        for code, confidence, score, method in zip(out_sent.tolist(), confs, scores, out_method.tolist()):
+            sentiment = SENTIMENT_NAMES[code]
+            results.append({
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "score": score,
+                "roberta_label": sentiment,  # Use sentiment name instead of raw label
+                "method": METHOD_NAMES[method]
+            })
+        
+        return results, cols
+    
     def convert_review_with_sentiment(self, amazon_review: Dict, product_id: str, 
-                                      sentiment_result: Optional[Dict], rating: Optional[float]) -> Dict:
-        """Convert review with pre-computed sentiment"""
+                                      sentiment_data: Dict, rating: Optional[float]) -> Dict:
+        """Convert review with pre-computed, finalized sentiment (see finalize_sentiment_batch)"""
         # Extract review text and title
         review_text = amazon_review.get('reviewText', '').strip()
         title = amazon_review.get('summary', '').strip()
         
-        # Process sentiment result
-        if sentiment_result:
-            raw_label = sentiment_result['label'].lower()
-            
-            # Map labels to sentiment
-            if raw_label in ['negative', 'label_0']:
-                sentiment = "negative"
-            elif raw_label in ['neutral', 'label_1']:
-                sentiment = "neutral"
-            elif raw_label in ['positive', 'label_2']:
-                sentiment = "positive"
-            else:
-                sentiment = "neutral"
-            
-            confidence = sentiment_result['score']
-            
-            # Calculate normalized score
-            if sentiment == "negative":
-                score = (1 - confidence) * 0.5
-            elif sentiment == "neutral":
-                score = 0.5
-            else:
-                score = 0.5 + (confidence * 0.5)
-            
-            method = "roberta"
-            
-            # Align with rating if available
-            if rating is not None:
-                if (sentiment == "positive" and rating >= 4) or \
-                   (sentiment == "negative" and rating <= 2) or \
-                   (sentiment == "neutral" and rating == 3):
-                    confidence = min(confidence * 1.1, 1.0)
-                    method = "roberta_aligned"
-                elif confidence < 0.6:
-                    if rating >= 4 and sentiment != "positive":
-                        sentiment = "positive"
-                        confidence = 0.75
-                        score = 0.75
-                        method = "roberta_rating_adjusted"
-                    elif rating <= 2 and sentiment != "negative":
-                        sentiment = "negative"
-                        confidence = 0.75
-                        score = 0.25
-                        method = "roberta_rating_adjusted"
-            
-            sentiment_data = {
-                "sentiment": sentiment,
-                "confidence": round(confidence, 4),
-                "score": round(score, 4),
-                "roberta_label": sentiment,  # Use sentiment name instead of raw label
-                "method": method
-            }
-        else:
-            # Fallback to rating-based
-            if rating is not None:
-                if rating >= 4:
-                    sentiment_data = {"sentiment": "positive", "confidence": 0.8, "score": 0.8, 
-                                    "roberta_label": "positive", "method": "rating_fallback"}
-                elif rating <= 2:
-                    sentiment_data = {"sentiment": "negative", "confidence": 0.8, "score": 0.2,
-                                    "roberta_label": "negative", "method": "rating_fallback"}
-                else:
-                    sentiment_data = {"sentiment": "neutral", "confidence": 0.7, "score": 0.5,
-                                    "roberta_label": "neutral", "method": "rating_fallback"}
-            else:
-                sentiment_data = {"sentiment": "neutral", "confidence": 0.5, "score": 0.5,
-                                "roberta_label": "neutral", "method": "default"}
-        
         # Convert to exact Walmart format
         converted = {
             'reviewer_name': amazon_review.get('reviewerName', 'Anonymous') or 'Anonymous',
@@ -279,19 +513,21 @@ class ReviewConverter:
         """Convert entire JSON file from Amazon format to Walmart format"""
         print(f"Reading {input_file}...")
         
-        with open(input_file, 'r', encoding='utf-8') as f:
-            amazon_reviews = json.load(f)
+        if orjson is not None:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError, so main() still reports bad JSON
+            with open(input_file, 'rb') as f:
+                amazon_reviews = orjson.loads(f.read())
+        else:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                amazon_reviews = json.load(f)
         
         print(f"Found {len(amazon_reviews)} reviews")
         print("Converting and analyzing sentiment...\n")
         
         # Group by product first to match structure
-        products = {}
+        products = defaultdict(list)
         for review in amazon_reviews:
-            product_id = review.get('asin', 'UNKNOWN')
-            if product_id not in products:
-                products[product_id] = []
-            products[product_id].append(review)
+            products[review.get('asin', 'UNKNOWN')].append(review)
         
         print(f"✓ Found {len(products)} unique products\n")
         
@@ -299,77 +535,145 @@ class ReviewConverter:
         all_reviews_converted = []
         all_products_data = []
         
-        # Calculate total reviews for progress bar
-        total_reviews = sum(len(reviews) for reviews in products.values())
-        
-        with tqdm(total=total_reviews, desc="Processing reviews", unit="review") as pbar:
-            for product_id, product_reviews in products.items():
-                print(f"\nProduct {product_id} ({len(product_reviews)} reviews)")
+        # Flatten every review up front (product_ids is the parallel array used to demux
+        # results back to products) and prepare its text and rating
+        product_ids = []
+        flat_reviews = []
+        texts_to_analyze = []
+        ratings = []
+        for product_id, product_reviews in products.items():
+            for review in product_reviews:
+                product_ids.append(product_id)
+                flat_reviews.append(review)
                 
-                # Batch process sentiment analysis
-                batch_size = 32
-                converted_reviews = []
+                try:
+                    rating = float(review.get('overall', 0))
+                    if rating == 0:
+                        rating = None
+                except:
+                    rating = None
+                ratings.append(rating)
                 
-                for i in range(0, len(product_reviews), batch_size):
-                    batch = product_reviews[i:i+batch_size]
-                    
-                    # Prepare texts for batch analysis
-                    texts_to_analyze = []
-                    ratings = []
-                    for review in batch:
-                        try:
-                            rating = float(review.get('overall', 0))
-                            if rating == 0:
-                                rating = None
-                        except:
-                            rating = None
-                        ratings.append(rating)
-                        
-                        title = review.get('summary', '').strip()
-                        review_text = review.get('reviewText', '').strip()
-                        text = f"{title} {review_text}".strip()
-                        texts_to_analyze.append(text[:2000] if len(text) > 2000 else text)
-                    
-                    # Batch sentiment analysis
-                    if self.sentiment_pipeline and texts_to_analyze:
-                        try:
-                            sentiment_results = self.sentiment_pipeline(texts_to_analyze)
-                        except:
-                            sentiment_results = [None] * len(batch)
-                    else:
-                        sentiment_results = [None] * len(batch)
-                    
-                    # Convert reviews with pre-computed sentiments
-                    for j, review in enumerate(batch):
-                        converted = self.convert_review_with_sentiment(
-                            review, product_id, sentiment_results[j], ratings[j]
-                        )
-                        converted_reviews.append(converted)
-                        all_reviews_converted.append(converted)
-                        pbar.update(1)
+                title = review.get('summary', '').strip()
+                review_text = review.get('reviewText', '').strip()
+                text = f"{title} {review_text}".strip()
+                texts_to_analyze.append(text[:2000] if len(text) > 2000 else text)
+        
+        # Batch sentiment analysis over length-sorted texts from all products, so each
+        # batch is only padded to the longest review among similarly sized ones
+        batch_size = 128 if self.device == 0 else 64
+        sentiment_results = [None] * len(texts_to_analyze)
+        
+        # Empty texts, and very short texts with a clear 1/2/5-star rating, go straight to the
+        # rating fallback instead of the model
+        model_idx = [
+            i for i, text in enumerate(texts_to_analyze)
+            if text and not (len(text) < 20 and ratings[i] in (1.0, 2.0, 5.0))
+        ]
+        
+        if self.sentiment_pipeline and model_idx:
+            # Run the model once per distinct text; back_ref maps each review to its text's slot
+            unique_slots = {}
+            back_ref = [unique_slots.setdefault(texts_to_analyze[i], len(unique_slots)) for i in model_idx]
+            unique_texts = list(unique_slots)
+            unique_results = [None] * len(unique_texts)
+            
+            # Tokenize everything once (Rust fast tokenizer); the same encodings give the sort key
+            encodings = self.tokenizer(unique_texts, truncation=True, max_length=512, return_length=True)
+            order = sorted(range(len(unique_texts)), key=encodings['length'].__getitem__)
             
-                # Create product data structure
-                product_data = {
-                    "product_id": product_id,
-                    "product_url": f"https://www.amazon.com/dp/{product_id}",
-                    "product_name": None,
-                    "reviews": converted_reviews,
-                    "scraped_at": datetime.now().isoformat()
-                }
-                all_products_data.append(product_data)
+            # Workers pad the next batches into pinned tensors while the model runs.
+            # On CUDA batches are padded to fixed length buckets so captured graphs can be replayed.
+            if self.use_cuda_graphs:
+                collate_fn = BucketCollator(self.tokenizer)
+            else:
+                collate_fn = partial(self.tokenizer.pad, pad_to_multiple_of=8, return_tensors='pt')
+            
+            loader = DataLoader(
+                ReviewEncodingDataset(encodings, order),
+                batch_size=batch_size,
+                collate_fn=collate_fn,
+                num_workers=2,
+                pin_memory=self.device == 0
+            )
+            id2label = self.model.config.id2label
+            
+            with tqdm(total=len(order), desc="Analyzing sentiment", unit="review",
+                      mininterval=0.5, miniters=64) as pbar:
+                try:
+                    with torch.inference_mode():
+                        done = 0
+                        for batch in loader:
+                            batch = {k: v.to(self.model.device, non_blocking=True) for k, v in batch.items()}
+                            logits = self.graphed_logits(batch['input_ids'], batch['attention_mask'], batch_size)
+                            probs = logits.float().softmax(dim=-1)
+                            scores, labels = probs.max(dim=-1)
+                            
+                            for j, label, score in zip(order[done:done + len(scores)], labels.tolist(), scores.tolist()):
+                                unique_results[j] = {'label': id2label[label], 'score': score}
+                            done += len(scores)
+                            pbar.update(len(scores))
+                except Exception as e:
+                    # Reviews not reached keep None and fall back to rating-based sentiment
+                    print(f"RoBERTa error: {e}")
+            
+            for i, slot in zip(model_idx, back_ref):
+                sentiment_results[i] = unique_results[slot]
+        
+        # Map predictions to final sentiment/score in one vectorized pass
+        sentiment_results, cols = self.finalize_sentiment_batch(sentiment_results, ratings)
+        
+        # Convert reviews with pre-computed sentiments, demuxing them back to their products
+        converted_by_product = defaultdict(list)
+        
+        with tqdm(total=len(flat_reviews), desc="Processing reviews", unit="review",
+                  mininterval=0.5, miniters=64) as pbar:
+            for product_id, review, sentiment_data, rating in zip(product_ids, flat_reviews, sentiment_results, ratings):
+                converted = self.convert_review_with_sentiment(review, product_id, sentiment_data, rating)
+                converted_by_product[product_id].append(converted)
+                all_reviews_converted.append(converted)
+                pbar.update(1)
+        
+        # Create product data structures
+        for product_id in products:
+            all_products_data.append({
+                "product_id": product_id,
+                "product_url": f"https://www.amazon.com/dp/{product_id}",
+                "product_name": None,
+                "reviews": converted_by_product[product_id],
+                "scraped_at": datetime.now().isoformat()
+            })
         
         print(f"\n✓ Converted {len(all_reviews_converted)} reviews")
         
         # Calculate statistics
-        positive_reviews = [r for r in all_reviews_converted if r.get('sentiment') == 'positive']
-        negative_reviews = [r for r in all_reviews_converted if r.get('sentiment') == 'negative']
-        neutral_reviews = [r for r in all_reviews_converted if r.get('sentiment') == 'neutral']
+        # Statistics straight from the sentiment columns; dicts are only used for output
+        sentiment_codes = cols['sentiment']
+        confidence = cols['confidence']
+        score = cols['score']
+        
+        def column_mean(values):
+            return float(values.mean()) if values.size else 0
+        
+        sentiment_masks = {
+            'positive': sentiment_codes == 2,
+            'negative': sentiment_codes == 0,
+            'neutral': sentiment_codes == 1
+        }
+        positive_reviews, negative_reviews, neutral_reviews = (
+            [all_reviews_converted[i] for i in np.flatnonzero(sentiment_masks[name])]
+            for name in ('positive', 'negative', 'neutral')
+        )
+        sentiment_averages = {
+            name: (round(column_mean(confidence[mask]), 4), round(column_mean(score[mask]), 4))
+            for name, mask in sentiment_masks.items()
+        }
         
-        all_confidences = [r.get('confidence', 0) for r in all_reviews_converted if r.get('confidence')]
-        avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0
+        avg_confidence = column_mean(confidence[confidence != 0])
+        avg_score = column_mean(score)
         
-        all_scores = [r.get('score', 0) for r in all_reviews_converted if r.get('score') is not None]
-        avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
+        method_counts = np.bincount(cols['method'], minlength=len(METHOD_NAMES))
+        methods = {METHOD_NAMES[m]: int(count) for m, count in enumerate(method_counts) if count}
         
         # Create output structure matching MULTILINK_SCRAPER format exactly
         output = {
@@ -401,65 +705,61 @@ class ReviewConverter:
         
         # Save main combined JSON
         json_file = f"{output_base}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        write_json(json_file, output)
         print(f"\n✓ Saved combined file to {json_file}")
         
         # Save separate sentiment JSON files
         positive_file = f"{output_base}_positive.json"
-        with open(positive_file, 'w', encoding='utf-8') as f:
-            positive_data = {
-                "metadata": {
-                    "source_file": input_file,
-                    "sentiment": "positive",
-                    "total_reviews": len(positive_reviews),
-                    "average_confidence": round(sum(r['confidence'] for r in positive_reviews) / len(positive_reviews), 4) if positive_reviews else 0,
-                    "average_score": round(sum(r['score'] for r in positive_reviews) / len(positive_reviews), 4) if positive_reviews else 0,
-                    "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
-                    "converted_at": datetime.now().isoformat()
-                },
-                "reviews": positive_reviews
-            }
-            json.dump(positive_data, f, indent=2, ensure_ascii=False)
+        positive_data = {
+            "metadata": {
+                "source_file": input_file,
+                "sentiment": "positive",
+                "total_reviews": len(positive_reviews),
+                "average_confidence": sentiment_averages['positive'][0],
+                "average_score": sentiment_averages['positive'][1],
+                "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
+                "converted_at": datetime.now().isoformat()
+            },
+            "reviews": positive_reviews
+        }
+        write_json(positive_file, positive_data)
         print(f"✓ Saved positive reviews to {positive_file}")
         
         negative_file = f"{output_base}_negative.json"
-        with open(negative_file, 'w', encoding='utf-8') as f:
-            negative_data = {
-                "metadata": {
-                    "source_file": input_file,
-                    "sentiment": "negative",
-                    "total_reviews": len(negative_reviews),
-                    "average_confidence": round(sum(r['confidence'] for r in negative_reviews) / len(negative_reviews), 4) if negative_reviews else 0,
-                    "average_score": round(sum(r['score'] for r in negative_reviews) / len(negative_reviews), 4) if negative_reviews else 0,
-                    "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
-                    "converted_at": datetime.now().isoformat()
-                },
-                "reviews": negative_reviews
-            }
-            json.dump(negative_data, f, indent=2, ensure_ascii=False)
+        negative_data = {
+            "metadata": {
+                "source_file": input_file,
+                "sentiment": "negative",
+                "total_reviews": len(negative_reviews),
+                "average_confidence": sentiment_averages['negative'][0],
+                "average_score": sentiment_averages['negative'][1],
+                "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
+                "converted_at": datetime.now().isoformat()
+            },
+            "reviews": negative_reviews
+        }
+        write_json(negative_file, negative_data)
         print(f"✓ Saved negative reviews to {negative_file}")
         
         neutral_file = f"{output_base}_neutral.json"
-        with open(neutral_file, 'w', encoding='utf-8') as f:
-            neutral_data = {
-                "metadata": {
-                    "source_file": input_file,
-                    "sentiment": "neutral",
-                    "total_reviews": len(neutral_reviews),
-                    "average_confidence": round(sum(r['confidence'] for r in neutral_reviews) / len(neutral_reviews), 4) if neutral_reviews else 0,
-                    "average_score": round(sum(r['score'] for r in neutral_reviews) / len(neutral_reviews), 4) if neutral_reviews else 0,
-                    "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
-                    "converted_at": datetime.now().isoformat()
-                },
-                "reviews": neutral_reviews
-            }
-            json.dump(neutral_data, f, indent=2, ensure_ascii=False)
+        neutral_data = {
+            "metadata": {
+                "source_file": input_file,
+                "sentiment": "neutral",
+                "total_reviews": len(neutral_reviews),
+                "average_confidence": sentiment_averages['neutral'][0],
+                "average_score": sentiment_averages['neutral'][1],
+                "sentiment_analyzer": "cardiffnlp/twitter-roberta-base-sentiment-latest",
+                "converted_at": datetime.now().isoformat()
+            },
+            "reviews": neutral_reviews
+        }
+        write_json(neutral_file, neutral_data)
         print(f"✓ Saved neutral reviews to {neutral_file}")
         
         # Save CSV
         csv_file = f"{output_base}.csv"
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        with open(csv_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
             # Field order matches the converted review structure
             fieldnames = [
                 'reviewer_name', 'rating', 'title', 'review_text', 'date', 
@@ -467,10 +767,10 @@ class ReviewConverter:
                 'sentiment', 'confidence', 'score', 'roberta_label', 'method',
                 'product_id', 'product_url', 'product_name'
             ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            for review in all_reviews_converted:
-                writer.writerow(review)
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            # Project rows onto the field list once and hand them to a single writerows call
+            writer.writerows([review.get(field, '') for field in fieldnames] for review in all_reviews_converted)
         print(f"✓ Saved to {csv_file}")
         
         # Print summary
@@ -487,12 +787,7 @@ class ReviewConverter:
         print(f"  Average Confidence: {avg_confidence:.2%}")
         print(f"  Average Score: {avg_score:.4f}")
         
-        # Method breakdown
-        methods = {}
-        for r in all_reviews_converted:
-            method = r.get('method', 'unknown')
-            methods[method] = methods.get(method, 0) + 1
-        
+        # Method breakdown (counted from the method column above)
         print(f"\nAnalysis Methods:")
         for method, count in sorted(methods.items(), key=lambda x: x[1], reverse=True):
             print(f"  {method}: {count} ({count/len(all_reviews_converted)*100:.1f}%)")
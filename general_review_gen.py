@@ -5,11 +5,128 @@ Outputs 3 separate JSON files (one for each sentiment)
 """
 
 import json
+import re
 import random
 import markovify
+import numpy as np
 from datetime import datetime
 from typing import List, Dict
 import os
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from markov_cache import model_cache_path, load_cached_model, save_cached_model
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHash = MinHashLSH = None
+
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def jaccard_exceeds(new_hashes, flat_hashes, offsets, rows, threshold):
+        """
+        True if the sorted word hashes in new_hashes have Jaccard similarity above
+        threshold with any listed row of the ragged (flat_hashes, offsets) store.
+        """
+        n = new_hashes.size
+        for r in rows:
+            start = offsets[r]
+            m = offsets[r + 1] - start
+            if min(n, m) <= threshold * max(n, m):
+                continue
+            
+            # Sorted-merge intersection
+            i = 0
+            j = 0
+            intersection = 0
+            while i < n and j < m:
+                a = new_hashes[i]
+                b = flat_hashes[start + j]
+                if a == b:
+                    intersection += 1
+                    i += 1
+                    j += 1
+                elif a < b:
+                    i += 1
+                else:
+                    j += 1
+            
+            if intersection / (n + m - intersection) > threshold:
+                return True
+        return False
+else:
+    jaccard_exceeds = None
+
+
+# Reviewer name parts, indexed by pre-drawn positions
+FIRST_NAMES = ('John', 'Sarah', 'Mike', 'Emily', 'David', 'Jessica', 'Chris',
+               'Amanda', 'Ryan', 'Jennifer', 'Matt', 'Lisa', 'Tom', 'Karen',
+               'Alex', 'Nicole', 'Brian', 'Rachel', 'Kevin', 'Lauren')
+LAST_INITIALS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Sentences markovify.Text would drop as input (stray quotes, brackets); applied here
+# because parsed_sentences bypasses its own input filter
+MARKOV_REJECT_RE = re.compile(r"(^')|('$)|\s'|'\s|[\"(\(\)\[\])]")
+
+
+def new_seen_filter(capacity: int):
+    """
+    Exact-duplicate filter for generated texts: a Bloom filter when pybloom_live is
+    installed (a rare false positive only costs a regenerated review), else a set
+    """
+    if ScalableBloomFilter is not None:
+        return ScalableBloomFilter(initial_capacity=max(capacity, 100), error_rate=1e-4)
+    return set()
+
+
+def json_load_file(path: str):
+    """Read and parse a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def json_dumps(data) -> bytes:
+    """Indented UTF-8 JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def write_dataset(path: str, dataset: Dict):
+    """
+    Write a {"metadata": ..., "products": [...]} dataset, serializing one product at
+    a time so the encoded output never has to be held in memory as a whole
+    """
+    with open(path, 'wb') as f:
+        f.write(b'{\n"metadata": ')
+        f.write(json_dumps(dataset['metadata']))
+        f.write(b',\n"products": [\n')
+        for i, product in enumerate(dataset['products']):
+            if i:
+                f.write(b',\n')
+            f.write(json_dumps(product))
+        f.write(b'\n]\n}\n')
 
 
 class SentimentReviewGenerator:
@@ -22,6 +139,50 @@ class SentimentReviewGenerator:
         self.markov_model = None
         self.training_reviews = []
         
+        # Word sets of accepted texts, tokenized once on acceptance, plus a MinHash LSH
+        # over them (when datasketch is installed) so similarity checks only compare
+        # against likely near-duplicates; both reset per generate_dataset
+        self._seen_words = []
+        self._lsh = None
+        
+        # With numba, accepted word sets are also kept as sorted hash rows in a growable
+        # ragged store (flat buffer + row offsets) for the compiled jaccard_exceeds kernel
+        self._hash_buf = None
+        self._hash_offsets = None
+        self._num_hashes = 0
+        
+        # Per-review random draws, made in bulk at the start of generate_dataset and
+        # indexed by the number of reviews accepted so far
+        self._draws = None
+        
+        # Training-review metadata as parallel arrays (built in train_markov_model)
+        self._md_ratings = None
+        self._md_verified = None
+        self._md_dates = None
+        
+        # (text, fingerprint) of the most recently checked text; a candidate is checked
+        # at two thresholds and then recorded, so it is only fingerprinted once
+        self._last_fingerprint = (None, None)
+        
+    def load_review_file(self, file_path: str) -> tuple:
+        """Read one JSON file and return (reviews of this sentiment, error or None)"""
+        try:
+            data = json_load_file(file_path)
+            
+            # Handle both single product and combined formats
+            reviews = []
+            if 'reviews' in data:
+                reviews = data['reviews']
+            elif 'products' in data:
+                for product in data['products']:
+                    reviews.extend(product.get('reviews', []))
+            
+            # Filter by sentiment
+            return [r for r in reviews if r.get('sentiment') == self.sentiment_type], None
+            
+        except Exception as e:
+            return [], e
+    
     def load_reviews_from_folder(self, folder_path: str):
         """Load all JSON files from folder and filter by sentiment"""
         print(f"\n{'='*60}")
@@ -36,33 +197,20 @@ class SentimentReviewGenerator:
         
         print(f"Found {len(json_files)} JSON file(s)")
         
-        all_reviews = []
+        # Read and decode files on a thread pool; results come back in file order
+        file_paths = [os.path.join(folder_path, json_file) for json_file in json_files]
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+            results = list(executor.map(self.load_review_file, file_paths))
         
-        for json_file in json_files:
-            file_path = os.path.join(folder_path, json_file)
+        for json_file, (sentiment_reviews, error) in zip(json_files, results):
             print(f"  Processing: {json_file}...")
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Handle both single product and combined formats
-                reviews = []
-                if 'reviews' in data:
-                    reviews = data['reviews']
-                elif 'products' in data:
-                    for product in data['products']:
-                        reviews.extend(product.get('reviews', []))
-                
-                # Filter by sentiment
-                sentiment_reviews = [r for r in reviews if r.get('sentiment') == self.sentiment_type]
-                all_reviews.extend(sentiment_reviews)
-                
+            if error:
+                print(f"    Error reading {json_file}: {error}")
+            else:
                 print(f"    Found {len(sentiment_reviews)} {self.sentiment_type} reviews")
-                
-            except Exception as e:
-                print(f"    Error reading {json_file}: {e}")
-                continue
+        
+        all_reviews = list(chain.from_iterable(sentiment_reviews for sentiment_reviews, _ in results))
         
         self.training_reviews = all_reviews
         print(f"\n✓ Total {self.sentiment_type} reviews loaded: {len(all_reviews)}")
@@ -70,38 +218,145 @@ class SentimentReviewGenerator:
         return len(all_reviews)
     
     def train_markov_model(self, state_size: int = 2):
-        """Train Markov chain model on review texts"""
+        """Train Markov chain model on review texts, reusing a cached model for an unchanged corpus"""
         print(f"Training Markov model for {self.sentiment_type} reviews...")
         
         if not self.training_reviews:
             raise ValueError(f"No {self.sentiment_type} training data loaded.")
         
-        # Combine all review texts
-        review_texts = []
-        for review in self.training_reviews:
-            text = review.get('review_text', '')
-            title = review.get('title', '')
-            
-            if title and text:
-                combined = f"{title}. {text}"
-            elif text:
-                combined = text
-            else:
-                continue
-            
-            review_texts.append(combined)
+        # Metadata columns sampled by index in sample_metadata
+        reviews = self.training_reviews
+        self._md_ratings = np.array([r.get('rating') for r in reviews], dtype=object)
+        self._md_verified = np.fromiter((r.get('verified_purchase', False) for r in reviews),
+                                        dtype=bool, count=len(reviews))
+        self._md_dates = np.array([r.get('date', '') for r in reviews], dtype=object)
+        
+        # Combine title and text for every review that has text
+        review_texts = [
+            f"{r['title']}. {r['review_text']}" if r.get('title') else r['review_text']
+            for r in self.training_reviews if r.get('review_text')
+        ]
         
         if not review_texts:
             raise ValueError(f"No valid review texts found in {self.sentiment_type} data")
         
-        # Train the model
-        training_text = "\n".join(review_texts)
-        self.markov_model = markovify.Text(training_text, state_size=state_size)
+        cache_path = model_cache_path(f"general_{self.sentiment_type}", state_size, review_texts)
+        self.markov_model = load_cached_model(cache_path)
+        if self.markov_model is not None:
+            print(f"✓ Loaded cached {self.sentiment_type} model from {cache_path}")
+            return
+        
+        # Train the model on pre-split sentences, without building one joined corpus string
+        parsed_sentences = [
+            sentence.split()
+            for text in review_texts
+            for sentence in markovify.split_into_sentences(text)
+            if sentence.strip() and not MARKOV_REJECT_RE.search(sentence)
+        ]
+        self.markov_model = markovify.Text(None, state_size=state_size, parsed_sentences=parsed_sentences)
+        
+        # Precompute each state's choices and cumulative weights for every product's generation
+        self.markov_model.compile(inplace=True)
         print(f"✓ Model trained on {len(review_texts)} {self.sentiment_type} review texts")
+        
+        save_cached_model(cache_path, self.markov_model)
 
     
-    def generate_review_text(self, seen_texts: set, seen_titles: set, max_attempts: int = 200) -> tuple:
-        """Generate unique synthetic review text and title"""
+    def text_minhash(self, words: frozenset):
+        """MinHash signature of a review's word set"""
+        m = MinHash(num_perm=64)
+        m.update_batch([w.encode('utf-8') for w in words])
+        return m
+    
+    def text_fingerprint(self, text: str) -> tuple:
+        """
+        (word set, sorted word hashes, MinHash) of a text; the hashes are only built
+        when numba is installed and the MinHash only while an LSH index is active
+        """
+        cached_text, fingerprint = self._last_fingerprint
+        if cached_text == text:
+            return fingerprint
+        
+        words = frozenset(text.lower().split())
+        hashes = self.word_hashes(words) if jaccard_exceeds is not None else None
+        minhash = self.text_minhash(words) if self._lsh is not None else None
+        
+        fingerprint = (words, hashes, minhash)
+        self._last_fingerprint = (text, fingerprint)
+        return fingerprint
+    
+    def is_similar_to_seen(self, text: str, threshold: float) -> bool:
+        """True if text's word-set Jaccard similarity to any seen text exceeds threshold"""
+        text_words, text_hashes, text_minhash = self.text_fingerprint(text)
+        
+        if self._lsh is not None:
+            # LSH is tuned below both thresholds; candidates are verified exactly below
+            rows = [int(key) for key in self._lsh.query(text_minhash)]
+        else:
+            rows = None
+        
+        if jaccard_exceeds is not None:
+            if rows is None:
+                rows = np.arange(len(self._seen_words))
+            else:
+                rows = np.array(rows, dtype=np.int64)
+            return jaccard_exceeds(text_hashes, self._hash_buf, self._hash_offsets, rows, threshold)
+        
+        candidates = self._seen_words if rows is None else [self._seen_words[r] for r in rows]
+        
+        # Jaccard <= min(a,b)/max(a,b), so most pairs are rejected on their sizes alone;
+        # the union size is a+b-|A&B|, so no union set is ever built
+        new_len = len(text_words)
+        
+        for existing_words in candidates:
+            ex_len = len(existing_words)
+            if min(new_len, ex_len) <= threshold * max(new_len, ex_len):
+                continue
+            intersection = len(text_words & existing_words)
+            if intersection / (new_len + ex_len - intersection) > threshold:
+                return True
+        
+        return False
+    
+    def word_hashes(self, words) -> np.ndarray:
+        """Sorted int64 hashes of a word set"""
+        hashes = np.fromiter((hash(w) for w in words), dtype=np.int64, count=len(words))
+        hashes.sort()
+        return hashes
+    
+    def reset_seen_hashes(self):
+        """Empty the ragged hash store"""
+        self._hash_buf = np.empty(4096, dtype=np.int64)
+        self._hash_offsets = np.zeros(257, dtype=np.int64)
+        self._num_hashes = 0
+    
+    def add_seen_hashes(self, hashes: np.ndarray):
+        """Append one text's word hashes as a row of the ragged hash store, growing buffers by doubling"""
+        row = len(self._seen_words)
+        end = self._num_hashes + hashes.size
+        
+        if end > self._hash_buf.size:
+            self._hash_buf = np.resize(self._hash_buf, max(end, 2 * self._hash_buf.size))
+        if row + 2 > self._hash_offsets.size:
+            self._hash_offsets = np.resize(self._hash_offsets, 2 * self._hash_offsets.size)
+        
+        self._hash_buf[self._num_hashes:end] = hashes
+        self._hash_offsets[row + 1] = end
+        self._num_hashes = end
+    
+    def add_seen_text(self, text: str, seen_texts: set):
+        """Record an accepted review text"""
+        seen_texts.add(text)
+        words, hashes, minhash = self.text_fingerprint(text)
+        
+        if self._lsh is not None:
+            self._lsh.insert(str(len(self._seen_words)), minhash)
+        if jaccard_exceeds is not None:
+            self.add_seen_hashes(hashes)
+        self._seen_words.append(words)
+    
+    def generate_review_text(self, seen_texts: set, max_attempts: int = 200) -> str:
+        """Generate unique synthetic review text"""
         if not self.markov_model:
             raise ValueError("Model not trained. Call train_markov_model() first.")
         
@@ -114,22 +369,17 @@ class SentimentReviewGenerator:
             if sentence and len(sentence.split()) >= 10:
                 if sentence not in seen_texts:
                     # Check for substantial similarity
-                    is_unique = True
-                    sentence_words = set(sentence.lower().split())
-                    for existing in seen_texts:
-                        existing_words = set(existing.lower().split())
-                        if len(sentence_words & existing_words) / len(sentence_words | existing_words) > 0.7:
-                            is_unique = False
-                            break
-                    
-                    if is_unique:
+                    if not self.is_similar_to_seen(sentence, 0.7):
                         review_text = sentence
                         break
         
         if not review_text:
             review_text = self.markov_model.make_sentence(tries=100)
         
-        # Generate title
+        return review_text
+    
+    def generate_review_title(self, seen_titles: set, max_attempts: int = 200) -> str:
+        """Generate a unique synthetic review title"""
         title = None
         for attempt in range(max_attempts):
             max_chars = random.randint(40, 100)
@@ -143,33 +393,48 @@ class SentimentReviewGenerator:
         if not title:
             title = self.markov_model.make_short_sentence(max_chars=100, tries=100) or ""
         
-        return title, review_text
+        return title
     
-    def sample_metadata(self) -> Dict:
+    def sample_metadata(self, draw_idx: int) -> Dict:
         """Sample realistic metadata from training data"""
-        if not self.training_reviews:
+        if self._md_ratings is None or not len(self._md_ratings):
             return {}
         
-        sample = random.choice(self.training_reviews)
+        draws = self._draws
+        i = draws['metadata_rows'][draw_idx]
         
         return {
-            'rating': sample.get('rating'),
-            'verified_purchase': sample.get('verified_purchase', False),
-            'helpful_count': random.choice([0, 0, 0, 1, 2]) if random.random() > 0.7 else 0,
-            'date': sample.get('date', ''),
+            'rating': self._md_ratings[i],
+            'verified_purchase': bool(self._md_verified[i]),
+            'helpful_count': int(draws['helpful_counts'][draw_idx]) if draws['helpful_flags'][draw_idx] > 0.7 else 0,
+            'date': self._md_dates[i],
+        }
+    
+    def draw_random_values(self, n: int):
+        """Pre-draw the per-review random values for up to n reviews in single vectorized calls"""
+        rng = np.random.default_rng()
+        confidence_range, score_range = self.get_confidence_score_range()
+        
+        self._draws = {
+            'confidences': rng.uniform(*confidence_range, size=n).round(4),
+            'scores': rng.uniform(*score_range, size=n).round(4),
+            'helpful_flags': rng.random(n),
+            'helpful_counts': rng.choice([0, 0, 0, 1, 2], size=n),
+            'name_flags': rng.random(n),
+            'first_names': rng.integers(len(FIRST_NAMES), size=n),
+            'last_initials': rng.integers(len(LAST_INITIALS), size=n),
+            'metadata_rows': rng.integers(max(len(self.training_reviews), 1), size=n),
         }
     
-    def generate_reviewer_name(self) -> str:
+    def generate_reviewer_name(self, draw_idx: int) -> str:
         """Generate realistic reviewer names"""
-        first_names = ['John', 'Sarah', 'Mike', 'Emily', 'David', 'Jessica', 'Chris', 
-                      'Amanda', 'Ryan', 'Jennifer', 'Matt', 'Lisa', 'Tom', 'Karen',
-                      'Alex', 'Nicole', 'Brian', 'Rachel', 'Kevin', 'Lauren']
+        draws = self._draws
+        first_name = FIRST_NAMES[draws['first_names'][draw_idx]]
         
-        if random.random() > 0.3:
-            last_initial = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            return f"{random.choice(first_names)} {last_initial}."
+        if draws['name_flags'][draw_idx] > 0.3:
+            return f"{first_name} {LAST_INITIALS[draws['last_initials'][draw_idx]]}."
         else:
-            return random.choice(first_names)
+            return first_name
     
     def get_confidence_score_range(self) -> tuple:
         """Get appropriate confidence and score ranges for sentiment type"""
@@ -186,23 +451,21 @@ class SentimentReviewGenerator:
         return confidence, score
 
     
-    def generate_synthetic_review(self, seen_texts: set, seen_titles: set, 
+    def generate_synthetic_review(self, review_text: str, seen_titles: set, draw_idx: int,
                                   product_id: str = None, product_name: str = None, 
                                   product_url: str = None) -> Dict:
-        """Generate a single synthetic review"""
-        title, review_text = self.generate_review_text(seen_texts, seen_titles)
-        
-        if not review_text:
-            return None
-        
-        metadata = self.sample_metadata()
-        confidence_range, score_range = self.get_confidence_score_range()
+        """
+        Build a synthetic review around an accepted review text: title, metadata and
+        reviewer name; draw_idx selects its pre-drawn random values
+        """
+        title = self.generate_review_title(seen_titles)
+        metadata = self.sample_metadata(draw_idx)
         
-        confidence = round(random.uniform(*confidence_range), 4)
-        score = round(random.uniform(*score_range), 4)
+        confidence = float(self._draws['confidences'][draw_idx])
+        score = float(self._draws['scores'][draw_idx])
         
         synthetic_review = {
-            'reviewer_name': self.generate_reviewer_name(),
+            'reviewer_name': self.generate_reviewer_name(draw_idx),
             'rating': metadata.get('rating', None),
             'title': title or '',
             'review_text': review_text,
@@ -236,10 +499,22 @@ class SentimentReviewGenerator:
         remainder = num_reviews % num_products
         
         products = []
-        seen_texts = set()
-        seen_titles = set()
+        seen_texts = new_seen_filter(num_reviews * 2)
+        seen_titles = new_seen_filter(num_reviews * 2)
         total_generated = 0
         
+        self._seen_words = []
+        self._last_fingerprint = (None, None)
+        if jaccard_exceeds is not None:
+            self.reset_seen_hashes()
+        if MinHashLSH is not None:
+            # Banding weighted against false negatives, since candidates are verified
+            # exactly: misses ~0.6% of pairs at Jaccard 0.6 and ~0.02% at 0.7
+            self._lsh = MinHashLSH(threshold=0.5, num_perm=64, weights=(0.1, 0.9))
+        
+        # At most num_reviews are accepted; rejected attempts reuse the same slot
+        self.draw_random_values(num_reviews)
+        
         for product_idx in range(num_products):
             product_id = f"{base_product_id or 'SYNTHETIC'}_{self.sentiment_type.upper()}_{product_idx + 1:03d}"
             product_name = f"Synthetic {self.sentiment_type.title()} Product {product_idx + 1}"
@@ -258,34 +533,20 @@ class SentimentReviewGenerator:
             while len(product_reviews) < target_reviews and attempts < max_attempts:
                 attempts += 1
                 
-                review = self.generate_synthetic_review(
-                    seen_texts, seen_titles, 
-                    product_id, product_name, product_url
-                )
+                # Check the text before spending any work on its title and metadata
+                review_text = self.generate_review_text(seen_texts)
                 
-                if review and review['review_text']:
-                    review_text = review['review_text']
-                    review_title = review['title']
-                    
+                if review_text:
                     if review_text not in seen_texts:
-                        is_unique = True
-                        review_words = set(review_text.lower().split())
-                        
-                        for existing_text in seen_texts:
-                            existing_words = set(existing_text.lower().split())
-                            intersection = len(review_words & existing_words)
-                            union = len(review_words | existing_words)
+                        if not self.is_similar_to_seen(review_text, 0.6):
+                            review = self.generate_synthetic_review(
+                                review_text, seen_titles, total_generated,
+                                product_id, product_name, product_url
+                            )
                             
-                            if union > 0:
-                                similarity = intersection / union
-                                if similarity > 0.6:
-                                    is_unique = False
-                                    break
-                        
-                        if is_unique:
-                            seen_texts.add(review_text)
-                            if review_title:
-                                seen_titles.add(review_title)
+                            self.add_seen_text(review_text, seen_texts)
+                            if review['title']:
+                                seen_titles.add(review['title'])
                             
                             product_reviews.append(review)
                             total_generated += 1
@@ -314,15 +575,12 @@ class SentimentReviewGenerator:
         
         print(f"✓ Generated {total_generated} unique {self.sentiment_type} reviews")
         
-        # Calculate averages
-        all_reviews = []
-        for product in products:
-            all_reviews.extend(product['reviews'])
-        
-        confidences = [r['confidence'] for r in all_reviews]
-        scores = [r['score'] for r in all_reviews]
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-        avg_score = sum(scores) / len(scores) if scores else 0
+        # Calculate averages; accepted reviews used the first total_generated draws
+        if total_generated:
+            avg_confidence = float(self._draws['confidences'][:total_generated].mean())
+            avg_score = float(self._draws['scores'][:total_generated].mean())
+        else:
+            avg_confidence = avg_score = 0
         
         dataset = {
             "metadata": {
@@ -344,6 +602,60 @@ class SentimentReviewGenerator:
 
 
 
+def run_sentiment(job: tuple) -> Dict:
+    """Load, train and generate one sentiment's dataset; returns its file info or None"""
+    sentiment, num_reviews, folder_path, num_products = job
+    
+    # Forked workers inherit the parent's RNG state; reseed so sentiments don't share a stream
+    random.seed()
+    
+    try:
+        print(f"\n{'='*70}")
+        print(f"PROCESSING {sentiment.upper()} REVIEWS")
+        print(f"{'='*70}")
+        
+        # Initialize generator
+        generator = SentimentReviewGenerator(sentiment)
+        
+        # Load reviews from folder
+        total_loaded = generator.load_reviews_from_folder(folder_path)
+        
+        if total_loaded == 0:
+            print(f"⚠ No {sentiment} reviews found in folder. Skipping...")
+            return None
+        
+        # Train model
+        generator.train_markov_model(state_size=2)
+        
+        # Generate synthetic reviews
+        synthetic_dataset = generator.generate_dataset(
+            num_reviews=num_reviews,
+            num_products=num_products,
+            base_product_id="SYNTHETIC"
+        )
+        
+        # Save to file
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = f"_combined_walmart_reviews_synthetic_{sentiment}_{timestamp}.json"
+        
+        write_dataset(output_file, synthetic_dataset)
+        
+        print(f"\n✓ {sentiment.upper()} reviews saved to: {output_file}")
+        
+        return {
+            'sentiment': sentiment,
+            'file': output_file,
+            'count': synthetic_dataset['metadata'][f'total_{sentiment}_reviews'],
+            'products': synthetic_dataset['metadata']['total_products']
+        }
+        
+    except Exception as e:
+        print(f"\n❌ Error generating {sentiment} reviews: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
 def main():
     print("\n" + "="*70)
     print("GENERAL SYNTHETIC REVIEW GENERATOR")
@@ -402,57 +714,18 @@ def main():
     review_counts = [num_positive, num_neutral, num_negative]
     generated_files = []
     
+    jobs = []
     for sentiment, num_reviews in zip(sentiments, review_counts):
         if num_reviews <= 0:
             print(f"\nSkipping {sentiment} (0 reviews requested)")
             continue
-        
-        try:
-            print(f"\n{'='*70}")
-            print(f"PROCESSING {sentiment.upper()} REVIEWS")
-            print(f"{'='*70}")
-            
-            # Initialize generator
-            generator = SentimentReviewGenerator(sentiment)
-            
-            # Load reviews from folder
-            total_loaded = generator.load_reviews_from_folder(folder_path)
-            
-            if total_loaded == 0:
-                print(f"⚠ No {sentiment} reviews found in folder. Skipping...")
-                continue
-            
-            # Train model
-            generator.train_markov_model(state_size=2)
-            
-            # Generate synthetic reviews
-            synthetic_dataset = generator.generate_dataset(
-                num_reviews=num_reviews,
-                num_products=num_products,
-                base_product_id="SYNTHETIC"
-            )
-            
-            # Save to file
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f"_combined_walmart_reviews_synthetic_{sentiment}_{timestamp}.json"
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(synthetic_dataset, f, indent=2, ensure_ascii=False)
-            
-            generated_files.append({
-                'sentiment': sentiment,
-                'file': output_file,
-                'count': synthetic_dataset['metadata'][f'total_{sentiment}_reviews'],
-                'products': synthetic_dataset['metadata']['total_products']
-            })
-            
-            print(f"\n✓ {sentiment.upper()} reviews saved to: {output_file}")
-            
-        except Exception as e:
-            print(f"\n❌ Error generating {sentiment} reviews: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
+        jobs.append((sentiment, num_reviews, folder_path, num_products))
+    
+    # Each sentiment trains and generates independently, so run them in parallel processes
+    if jobs:
+        with multiprocessing.Pool(min(len(jobs), os.cpu_count() or 1)) as pool:
+            results = pool.map(run_sentiment, jobs)
+        generated_files = [file_info for file_info in results if file_info]
     
     # Final summary
     print("\n" + "="*70)
@@ -476,8 +749,7 @@ def main():
             print(f"{'='*70}")
             
             try:
-                with open(first_file['file'], 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = json_load_file(first_file['file'])
                 
                 if data['products']:
                     first_product = data['products'][0]
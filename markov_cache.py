@@ -0,0 +1,45 @@
+"""
+Markov Model Cache shared by the synthetic review generators
+Compiled models are stored as cache/markov_{name}_{state_size}_{signature}.json, where
+the signature hashes the training texts, so a changed corpus gets a new file
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+import markovify
+
+MODEL_CACHE_DIR = "cache"
+
+
+def model_cache_path(name: str, state_size: int, review_texts: Iterable[str],
+                     cache_dir: str = MODEL_CACHE_DIR) -> str:
+    """Cache file for a model called name trained on review_texts"""
+    signature = hashlib.blake2b(digest_size=16)
+    for text in review_texts:
+        signature.update(text.encode('utf-8'))
+        signature.update(b'\n')
+    return os.path.join(cache_dir, f"markov_{name}_{state_size}_{signature.hexdigest()}.json")
+
+
+def load_cached_model(cache_path: str) -> Optional[markovify.Text]:
+    """Model saved at cache_path, or None if there is none or it can't be read"""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return markovify.Text.from_json(f.read())
+    except Exception as e:
+        print(f"  Could not load cached model ({e}), retraining...")
+        return None
+
+
+def save_cached_model(cache_path: str, model: markovify.Text):
+    """Write model to cache_path; failures are reported, not raised"""
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            f.write(model.to_json())
+    except OSError as e:
+        print(f"  Could not cache model: {e}")
@@ -5,11 +5,173 @@ Maintains the same JSON structure as the scraper output
 """
 
 import json
+import hashlib
+import pickle
 import random
 import markovify
+import numpy as np
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from markov_cache import MODEL_CACHE_DIR, model_cache_path, load_cached_model, save_cached_model
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHash = MinHashLSH = None
+
+# Negative reviews typically have higher confidence and lower score
+CONFIDENCE_RANGE = (0.65, 0.95)
+SCORE_RANGE = (0.10, 0.35)
+
+# Reviewer first names; "First L." names are precomputed per generator
+FIRST_NAMES = ('John', 'Sarah', 'Mike', 'Emily', 'David', 'Jessica', 'Chris',
+               'Amanda', 'Ryan', 'Jennifer', 'Matt', 'Lisa', 'Tom', 'Karen')
+
+
+def json_load_file(path: str):
+    """Read and parse a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_dataset_reviews(json_file: str, info: Dict):
+    """
+    Yield the reviews of a single-product ('reviews') or combined ('products') dataset
+    file, streaming them with ijson when it is installed so the whole document is never
+    held in memory. info['format'] and info['products'] are filled in as it reads.
+    """
+    if ijson is not None:
+        # First top-level key that identifies the format
+        dataset_format = None
+        with open(json_file, 'rb') as f:
+            for prefix, event, value in ijson.parse(f):
+                if prefix == '' and event == 'map_key' and value in ('reviews', 'products'):
+                    dataset_format = value
+                    break
+    else:
+        data = json_load_file(json_file)
+        dataset_format = 'reviews' if 'reviews' in data else 'products' if 'products' in data else None
+    
+    if dataset_format is None:
+        raise ValueError("Unknown JSON format. Expected 'reviews' or 'products' key.")
+    info['format'] = dataset_format
+    info['products'] = 0
+    
+    if ijson is not None:
+        with open(json_file, 'rb') as f:
+            if dataset_format == 'reviews':
+                yield from ijson.items(f, 'reviews.item', use_float=True)
+            else:
+                for product in ijson.items(f, 'products.item', use_float=True):
+                    info['products'] += 1
+                    yield from product.get('reviews', [])
+    elif dataset_format == 'reviews':
+        yield from data['reviews']
+    else:
+        for product in data['products']:
+            info['products'] += 1
+            yield from product.get('reviews', [])
+
+
+class SyntheticReview:
+    """One generated review; kept as a slotted object until to_dict at output time"""
+    __slots__ = ('reviewer_name', 'rating', 'title', 'review_text', 'date', 'verified_purchase',
+                 'helpful_count', 'confidence', 'score', 'product_id', 'product_name', 'product_url')
+    
+    def __init__(self, reviewer_name: str, rating: Optional[int], title: str, review_text: str,
+                 date: str, verified_purchase: bool, helpful_count: int, confidence: float,
+                 score: float, product_id: Optional[str] = None, product_name: Optional[str] = None,
+                 product_url: Optional[str] = None):
+        self.reviewer_name = reviewer_name
+        self.rating = rating
+        self.title = title
+        self.review_text = review_text
+        self.date = date
+        self.verified_purchase = verified_purchase
+        self.helpful_count = helpful_count
+        self.confidence = confidence
+        self.score = score
+        self.product_id = product_id
+        self.product_name = product_name
+        self.product_url = product_url
+    
+    def to_dict(self) -> Dict:
+        """Review in the scraper's JSON layout"""
+        review = {
+            'reviewer_name': self.reviewer_name,
+            'rating': self.rating,
+            'title': self.title,
+            'review_text': self.review_text,
+            'date': self.date,
+            'verified_purchase': self.verified_purchase,
+            'helpful_count': self.helpful_count,
+            'sentiment': 'negative',
+            'confidence': self.confidence,
+            'score': self.score,
+            'roberta_label': 'negative',
+            'method': 'synthetic_markov'
+        }
+        
+        # Add product info if provided
+        if self.product_id:
+            review['product_id'] = self.product_id
+        if self.product_name:
+            review['product_name'] = self.product_name
+        if self.product_url:
+            review['product_url'] = self.product_url
+        
+        return review
+
+
+# SimHash prefilter for large similarity scans: pairs whose 256-bit fingerprints differ
+# in more bits than this are skipped without a set intersection. Texts above the 0.6
+# Jaccard threshold sit around 60 bits apart, so misses are rare but possible; only
+# used once a scan has at least SIMHASH_MIN_CANDIDATES entries, which in practice
+# only happens without the LSH index, so fingerprints are only computed then
+SIMHASH_MAX_DISTANCE = 80
+SIMHASH_MIN_CANDIDATES = 1000
+
+
+def simhash256(words) -> int:
+    """256-bit SimHash of a word set: per-bit majority vote over each word's blake2b digest"""
+    if not words:
+        return 0
+    digests = b''.join(hashlib.blake2b(w.encode('utf-8'), digest_size=32).digest() for w in words)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(words), 32), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(words)
+    return int.from_bytes(np.packbits(votes).tobytes(), 'big')
+
+
+def text_key(text: str) -> int:
+    """Stable 64-bit key of a review text, stored instead of the text for exact-duplicate checks"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def write_json(path: str, data):
+    """Write indented JSON to path, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
 
 class SyntheticReviewGenerator:
@@ -17,36 +179,65 @@ class SyntheticReviewGenerator:
         self.markov_model = None
         self.training_reviews = []
         
+        # (word set, word count, simhash256 or None) of accepted texts in insertion order, tokenized
+        # once on acceptance, plus a MinHash LSH over the word sets (when datasketch is
+        # installed) so similarity checks only look at likely near-duplicates; both
+        # reset per generate_dataset
+        self._seen_tokens = []
+        self._lsh = None
+        
+        # The same entries bucketed by word count, for length-bounded scans without LSH
+        self._seen_by_len = defaultdict(list)
+        
+        # Exact-match keys of accepted texts and titles from the last generate_dataset,
+        # saved alongside the similarity index by save_seen_index
+        self._seen_texts = set()
+        self._seen_titles = set()
+        
+        # Pre-generated review text candidates, consumed by generate_review_text
+        self._candidates = []
+        
+        # Per-review random values for the product being generated, drawn in bulk by
+        # draw_review_values and indexed by the number of reviews accepted so far
+        self._draws = None
+        
+        # Every first name / last initial combination, so a name is a single choice
+        self._names_with_initial = [f"{first_name} {initial}." for first_name in FIRST_NAMES
+                                    for initial in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ']
+        self._names_first_only = list(FIRST_NAMES)
+        
     def load_dataset(self, json_file: str, append: bool = True):
         """Load existing Walmart review dataset"""
         print(f"Loading dataset from {os.path.basename(json_file)}...")
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Filter for negative reviews only (if sentiment data exists). Other reviews
+        # are only kept until the first negative one shows up, for files without
+        # sentiment data
+        info = {}
+        negative_reviews = []
+        other_reviews = []
+        total_reviews = 0
         
         # Handle both single product and combined formats
-        if 'reviews' in data:
-            # Single product format
-            reviews = data['reviews']
-            print(f"  Found {len(reviews)} reviews from single product")
-        elif 'products' in data:
-            # Combined format
-            reviews = []
-            for product in data['products']:
-                reviews.extend(product.get('reviews', []))
-            print(f"  Found {len(reviews)} reviews from {len(data['products'])} products")
+        for review in iter_dataset_reviews(json_file, info):
+            total_reviews += 1
+            if review.get('sentiment') == 'negative':
+                negative_reviews.append(review)
+                other_reviews = None
+            elif other_reviews is not None:
+                other_reviews.append(review)
+        
+        if info['format'] == 'reviews':
+            print(f"  Found {total_reviews} reviews from single product")
         else:
-            raise ValueError("Unknown JSON format. Expected 'reviews' or 'products' key.")
-        
-        # Filter for negative reviews only (if sentiment data exists)
-        negative_reviews = [r for r in reviews if r.get('sentiment') == 'negative']
+            print(f"  Found {total_reviews} reviews from {info['products']} products")
         
         if negative_reviews:
             print(f"  Using {len(negative_reviews)} negative reviews for training")
             new_reviews = negative_reviews
         else:
-            print(f"  No sentiment data found, using all {len(reviews)} reviews")
-            new_reviews = reviews
+            print(f"  No sentiment data found, using all {total_reviews} reviews")
+            new_reviews = other_reviews
         
         # Append or replace training data
         if append and self.training_reviews:
@@ -56,28 +247,22 @@ class SyntheticReviewGenerator:
         
         return len(new_reviews)
     
-    def train_markov_model(self, state_size: int = 2):
-        """Train Markov chain model on review texts"""
+    def train_markov_model(self, state_size: int = 2, cache_dir: str = MODEL_CACHE_DIR):
+        """
+        Train Markov chain model on review texts. The compiled model is cached in
+        cache_dir keyed on the training corpus, so an unchanged corpus is not retrained;
+        pass cache_dir=None to always train
+        """
         print(f"Training Markov model (state_size={state_size})...")
         
         if not self.training_reviews:
             raise ValueError("No training data loaded. Call load_dataset() first.")
         
-        # Combine all review texts
-        review_texts = []
-        for review in self.training_reviews:
-            text = review.get('review_text', '')
-            title = review.get('title', '')
-            
-            # Combine title and text for better context
-            if title and text:
-                combined = f"{title}. {text}"
-            elif text:
-                combined = text
-            else:
-                continue
-            
-            review_texts.append(combined)
+        # Combine title and text for better context, for every review that has text
+        review_texts = [
+            f"{r['title']}. {r['review_text']}" if r.get('title') else r['review_text']
+            for r in self.training_reviews if r.get('review_text')
+        ]
         
         if not review_texts:
             raise ValueError("No valid review texts found in training data")
@@ -85,46 +270,119 @@ class SyntheticReviewGenerator:
         # Join all texts with newlines for Markov training
         training_text = "\n".join(review_texts)
         
-        # Train the model
+        cache_path = model_cache_path('negative', state_size, review_texts, cache_dir) if cache_dir else None
+        if cache_path:
+            self.markov_model = load_cached_model(cache_path)
+            if self.markov_model is not None:
+                print(f"✓ Loaded cached model for {len(review_texts)} review texts")
+                return
+        
+        # Train the model, then precompute each state's choices and cumulative weights
         self.markov_model = markovify.Text(training_text, state_size=state_size)
+        self.markov_model.compile(inplace=True)
         print(f"✓ Model trained on {len(review_texts)} review texts")
+        
+        if cache_path:
+            save_cached_model(cache_path, self.markov_model)
+    
+    def text_minhash(self, words: set):
+        """MinHash signature of a review's word set"""
+        m = MinHash(num_perm=64)
+        m.update_batch([w.encode('utf-8') for w in words])
+        return m
+    
+    def is_similar_to_seen(self, text: str, threshold: float) -> bool:
+        """True if text's word-set Jaccard similarity to any accepted text exceeds threshold"""
+        text_words = frozenset(text.lower().split())
+        text_count = len(text_words)
+        
+        if self._lsh is not None:
+            # The index is tuned below both thresholds; candidates are verified exactly
+            candidates = [self._seen_tokens[int(key)] for key in self._lsh.query(self.text_minhash(text_words))]
+        else:
+            # Jaccard <= min(a,b)/max(a,b), so only word counts within
+            # (threshold*n, n/threshold) can match; scan just those buckets
+            # (bounds are padded by one and made exact by the check below)
+            low = int(threshold * text_count)
+            high = int(text_count / threshold) + 1 if threshold > 0 else max(self._seen_by_len, default=0)
+            candidates = [entry for count in range(low, high + 1) for entry in self._seen_by_len.get(count, ())]
+        
+        text_simhash = simhash256(text_words) if len(candidates) >= SIMHASH_MIN_CANDIDATES else None
+        
+        for existing_words, existing_count, existing_simhash in candidates:
+            if min(text_count, existing_count) <= threshold * max(text_count, existing_count):
+                continue
+            if (text_simhash is not None and existing_simhash is not None
+                    and bin(text_simhash ^ existing_simhash).count('1') > SIMHASH_MAX_DISTANCE):
+                continue
+            
+            # Calculate Jaccard similarity; the union size follows from the counts
+            intersection = len(text_words & existing_words)
+            union = text_count + existing_count - intersection
+            
+            if union > 0 and intersection / union > threshold:
+                return True
+        
+        return False
+    
+    def add_seen_text(self, text: str, seen_texts: set):
+        """Record an accepted review text; seen_texts holds text_key values, not the texts"""
+        seen_texts.add(text_key(text))
+        words = frozenset(text.lower().split())
+        
+        if self._lsh is not None:
+            self._lsh.insert(str(len(self._seen_tokens)), self.text_minhash(words))
+            entry = (words, len(words), None)
+        else:
+            entry = (words, len(words), simhash256(words))
+        self._seen_tokens.append(entry)
+        self._seen_by_len[len(words)].append(entry)
+    
+    def generate_candidate_batch(self, n: int = 128) -> List[str]:
+        """Make n review text candidates in one pass (None where markovify gave up)"""
+        make_sentence = self.markov_model.make_sentence
+        randint = random.randint
+        # Vary the parameters for more diversity
+        return [make_sentence(tries=100, max_words=randint(15, 80)) for _ in range(n)]
     
     def generate_review_text(self, seen_texts: set, seen_titles: set, max_attempts: int = 200) -> tuple:
         """Generate unique synthetic review text and title"""
         if not self.markov_model:
             raise ValueError("Model not trained. Call train_markov_model() first.")
         
-        # Generate review text (longer) - ensure uniqueness
+        # Generate review text (longer) - ensure uniqueness. Candidates too short for
+        # a body, and any still buffered once the body is found, are tried as the title
         review_text = None
+        title = None
         for attempt in range(max_attempts):
-            # Vary the parameters for more diversity
-            max_words = random.randint(15, 80)
-            sentence = self.markov_model.make_sentence(tries=100, max_words=max_words)
+            # Each attempt takes one candidate; refill the buffer a batch at a time,
+            # but only while the body is still missing
+            if not self._candidates:
+                if review_text:
+                    break
+                self._candidates = self.generate_candidate_batch()
+            sentence = self._candidates.pop()
+            
+            if not sentence:
+                continue
+            num_words = len(sentence.split())
             
-            if sentence and len(sentence.split()) >= 10:
-                # Check if unique
-                if sentence not in seen_texts:
-                    # Also check for substantial similarity (fuzzy check)
-                    is_unique = True
-                    sentence_words = set(sentence.lower().split())
-                    for existing in seen_texts:
-                        existing_words = set(existing.lower().split())
-                        # If more than 70% words overlap, consider it duplicate
-                        if len(sentence_words & existing_words) / len(sentence_words | existing_words) > 0.7:
-                            is_unique = False
-                            break
-                    
-                    if is_unique:
-                        review_text = sentence
-                        break
+            # Exact-duplicate guard only; generate_dataset's stricter 0.6
+            # similarity check is authoritative
+            if not review_text and num_words >= 10 and text_key(sentence) not in seen_texts:
+                review_text = sentence
+            elif not title and 3 <= num_words <= 15 and len(sentence) <= 100 and sentence not in seen_titles:
+                title = sentence
+            
+            if review_text and title:
+                break
         
         if not review_text:
             # Fallback: try without uniqueness check
             review_text = self.markov_model.make_sentence(tries=100)
         
         # Generate title (shorter) - ensure uniqueness
-        title = None
-        for attempt in range(max_attempts):
+        for attempt in range(0 if title else max_attempts):
             max_chars = random.randint(40, 100)
             sentence = self.markov_model.make_short_sentence(max_chars=max_chars, tries=100)
             
@@ -138,76 +396,218 @@ class SyntheticReviewGenerator:
         
         return title, review_text
     
-    def sample_metadata(self) -> Dict:
+    def draw_review_values(self, n: int):
+        """
+        Pre-draw confidence, score, helpful count and the training review whose
+        metadata is reused, for up to n reviews, in one bulk call each
+        """
+        rng = np.random.default_rng()
+        
+        self._draws = {
+            'confidences': rng.uniform(*CONFIDENCE_RANGE, size=n).round(4),
+            'scores': rng.uniform(*SCORE_RANGE, size=n).round(4),
+            'helpful_counts': np.where(rng.random(n) > 0.7, rng.choice([0, 0, 0, 1, 2], size=n), 0),
+            'metadata_samples': random.choices(self.training_reviews, k=n) if self.training_reviews else [],
+        }
+    
+    def sample_metadata(self, draw_idx: int) -> Dict:
         """Sample realistic metadata from training data"""
         if not self.training_reviews:
             return {}
         
-        sample = random.choice(self.training_reviews)
+        sample = self._draws['metadata_samples'][draw_idx]
         
         return {
             'rating': sample.get('rating'),
             'verified_purchase': sample.get('verified_purchase', False),
-            'helpful_count': random.choice([0, 0, 0, 1, 2]) if random.random() > 0.7 else 0,
+            'helpful_count': int(self._draws['helpful_counts'][draw_idx]),
             'date': sample.get('date', ''),
         }
     
     def generate_reviewer_name(self) -> str:
         """Generate realistic reviewer names"""
-        first_names = ['John', 'Sarah', 'Mike', 'Emily', 'David', 'Jessica', 'Chris', 
-                      'Amanda', 'Ryan', 'Jennifer', 'Matt', 'Lisa', 'Tom', 'Karen']
-        
         if random.random() > 0.3:
             # Full name with initial
-            last_initial = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            return f"{random.choice(first_names)} {last_initial}."
+            return random.choice(self._names_with_initial)
         else:
             # Just first name
-            return random.choice(first_names)
+            return random.choice(self._names_first_only)
     
-    def generate_synthetic_review(self, seen_texts: set, seen_titles: set, 
+    def generate_synthetic_review(self, seen_texts: set, seen_titles: set, draw_idx: int,
                                   product_id: str = None, product_name: str = None, 
-                                  product_url: str = None) -> Dict:
-        """Generate a single synthetic review matching Walmart format"""
+                                  product_url: str = None) -> SyntheticReview:
+        """
+        Generate a single synthetic review matching Walmart format; draw_idx selects
+        its pre-drawn values from draw_review_values
+        """
         title, review_text = self.generate_review_text(seen_texts, seen_titles)
         
         if not review_text:
             return None
         
-        metadata = self.sample_metadata()
-        
-        # Negative reviews typically have higher confidence and lower score
-        confidence = round(random.uniform(0.65, 0.95), 4)
-        score = round(random.uniform(0.10, 0.35), 4)
-        
-        synthetic_review = {
-            'reviewer_name': self.generate_reviewer_name(),
-            'rating': metadata.get('rating', None),
-            'title': title or '',
-            'review_text': review_text,
-            'date': metadata.get('date', ''),
-            'verified_purchase': metadata.get('verified_purchase', False),
-            'helpful_count': metadata.get('helpful_count', 0),
-            'sentiment': 'negative',
-            'confidence': confidence,
-            'score': score,
-            'roberta_label': 'negative',
-            'method': 'synthetic_markov'
+        metadata = self.sample_metadata(draw_idx)
+        
+        return SyntheticReview(
+            reviewer_name=self.generate_reviewer_name(),
+            rating=metadata.get('rating', None),
+            title=title or '',
+            review_text=review_text,
+            date=metadata.get('date', ''),
+            verified_purchase=metadata.get('verified_purchase', False),
+            helpful_count=metadata.get('helpful_count', 0),
+            confidence=float(self._draws['confidences'][draw_idx]),
+            score=float(self._draws['scores'][draw_idx]),
+            product_id=product_id,
+            product_name=product_name,
+            product_url=product_url
+        )
+    
+    def reset_seen_texts(self):
+        """Clear the accepted-text index used by the similarity checks"""
+        self._seen_tokens = []
+        self._seen_by_len = defaultdict(list)
+        # Banding weighted against false negatives, since candidates are verified
+        # exactly: misses ~0.6% of pairs at Jaccard 0.6
+        self._lsh = MinHashLSH(threshold=0.5, num_perm=64, weights=(0.1, 0.9)) if MinHashLSH is not None else None
+    
+    def seen_index(self) -> Dict:
+        """The accepted-text index and exact-match keys, as saved by save_seen_index"""
+        return {
+            'seen_tokens': self._seen_tokens,
+            'lsh': self._lsh,
+            'seen_texts': self._seen_texts,
+            'seen_titles': self._seen_titles,
         }
+    
+    def save_seen_index(self, index_file: str):
+        """Pickle the accepted-text index so a later run can avoid repeating these reviews"""
+        with open(index_file, 'wb') as f:
+            pickle.dump(self.seen_index(), f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def load_seen_index(self, index_file: str) -> bool:
+        """Replace the accepted-text index with one saved by save_seen_index; False if it can't be used"""
+        try:
+            with open(index_file, 'rb') as f:
+                index = pickle.load(f)
+        except Exception as e:
+            print(f"  Could not load dedup index {index_file}: {e}")
+            return False
+        
+        self.restore_seen_index(index)
+        print(f"  Loaded dedup index with {len(self._seen_tokens)} reviews from previous runs")
+        return True
+    
+    def restore_seen_index(self, index: Dict):
+        """Replace the accepted-text index with one returned by seen_index"""
+        self.reset_seen_texts()
+        self._seen_tokens = index['seen_tokens']
+        for entry in self._seen_tokens:
+            self._seen_by_len[entry[1]].append(entry)
+        
+        if index['lsh'] is not None:
+            self._lsh = index['lsh']
+        elif self._lsh is not None:
+            # Saved without datasketch; index the saved word sets now
+            for row, (words, _, _) in enumerate(self._seen_tokens):
+                self._lsh.insert(str(row), self.text_minhash(words))
+        
+        self._seen_texts = index['seen_texts']
+        self._seen_titles = index['seen_titles']
+    
+    def generate_product(self, product_idx: int, num_products: int, target_reviews: int,
+                         base_product_id: str, seen_texts: set, seen_titles: set) -> Dict:
+        """Generate one product's unique reviews; returns None if none could be generated"""
+        product_id = f"{base_product_id or 'SYNTHETIC'}_{product_idx + 1:03d}"
+        product_name = f"Synthetic Product {product_idx + 1}"
+        product_url = f"https://walmart.com/synthetic/{product_id}"
+        
+        product_reviews = []
+        attempts = 0
+        max_attempts = target_reviews * 10
+        failed_attempts = 0
+        max_failed = 100
+        
+        print(f"Product {product_idx + 1}/{num_products}: Generating {target_reviews} reviews...")
+        
+        # At most target_reviews are accepted; rejected attempts reuse the same slot
+        self.draw_review_values(target_reviews)
+        
+        while len(product_reviews) < target_reviews and attempts < max_attempts:
+            attempts += 1
+            
+            review = self.generate_synthetic_review(
+                seen_texts, seen_titles, len(product_reviews),
+                product_id, product_name, product_url
+            )
+            
+            if review and review.review_text:
+                review_text = review.review_text
+                review_title = review.title
+                
+                # Strict uniqueness check
+                if text_key(review_text) not in seen_texts:
+                    # Check for substantial similarity with existing reviews;
+                    # if more than 60% similar, reject
+                    if not self.is_similar_to_seen(review_text, 0.6):
+                        self.add_seen_text(review_text, seen_texts)
+                        if review_title:
+                            seen_titles.add(review_title)
+                        
+                        product_reviews.append(review)
+                        failed_attempts = 0
+                        
+                        if len(product_reviews) % 100 == 0:
+                            print(f"  Generated {len(product_reviews)}/{target_reviews}...")
+                    else:
+                        failed_attempts += 1
+                else:
+                    failed_attempts += 1
+            else:
+                failed_attempts += 1
+            
+            # Check if we're stuck
+            if failed_attempts >= max_failed:
+                print(f"\n⚠ Warning: Difficulty generating more unique reviews for product {product_idx + 1}")
+                print(f"  Generated {len(product_reviews)}/{target_reviews} reviews for this product")
+                break
+        
+        # Add product to dataset
+        if not product_reviews:
+            return None
         
-        # Add product info if provided
-        if product_id:
-            synthetic_review['product_id'] = product_id
-        if product_name:
-            synthetic_review['product_name'] = product_name
-        if product_url:
-            synthetic_review['product_url'] = product_url
-        
-        return synthetic_review
+        return {
+            'product_id': product_id,
+            'product_name': product_name,
+            'product_url': product_url,
+            'reviews': product_reviews
+        }
+    
+    def remove_cross_product_duplicates(self, products: List[Dict], seen_texts: set, seen_titles: set):
+        """
+        Drop reviews that duplicate or closely match a review kept earlier, across products;
+        products are updated in place and may be left with no reviews
+        """
+        for product in products:
+            kept = []
+            for review in product['reviews']:
+                review_text = review.review_text
+                if text_key(review_text) in seen_texts or self.is_similar_to_seen(review_text, 0.6):
+                    continue
+                self.add_seen_text(review_text, seen_texts)
+                if review.title:
+                    seen_titles.add(review.title)
+                kept.append(review)
+            
+            if len(kept) < len(product['reviews']):
+                print(f"  {product['product_id']}: dropped {len(product['reviews']) - len(kept)} cross-product near-duplicates")
+            product['reviews'] = kept
     
     def generate_dataset(self, num_reviews: int, num_products: int = 1, 
-                        base_product_id: str = None) -> Dict:
-        """Generate a complete synthetic dataset with unique reviews"""
+                        base_product_id: str = None, seen_index_file: str = None) -> Dict:
+        """
+        Generate a complete synthetic dataset with unique reviews; pass seen_index_file
+        (from save_seen_index) to also keep them distinct from a previous run's reviews
+        """
         print(f"Generating {num_reviews} synthetic negative reviews...")
         print("Ensuring all reviews are unique (text, structure, and wording)...\n")
         
@@ -215,92 +615,52 @@ class SyntheticReviewGenerator:
         reviews_per_product = num_reviews // num_products
         remainder = num_reviews % num_products
         
-        products = []
-        seen_texts = set()
-        seen_titles = set()
-        total_generated = 0
-        
-        for product_idx in range(num_products):
-            product_id = f"{base_product_id or 'SYNTHETIC'}_{product_idx + 1:03d}"
-            product_name = f"Synthetic Product {product_idx + 1}"
-            product_url = f"https://walmart.com/synthetic/{product_id}"
-            
-            # Calculate reviews for this product
-            target_reviews = reviews_per_product + (1 if product_idx < remainder else 0)
+        targets = [reviews_per_product + (1 if product_idx < remainder else 0)
+                   for product_idx in range(num_products)]
+        self.reset_seen_texts()
+        self._seen_texts = set()
+        self._seen_titles = set()
+        if seen_index_file:
+            self.load_seen_index(seen_index_file)
+        seen_texts = self._seen_texts
+        seen_titles = self._seen_titles
+        
+        workers = min(num_products, os.cpu_count() or 1)
+        if workers > 1:
+            # Products are independent apart from cross-product uniqueness, so generate them
+            # in worker processes (each deduplicating its own output against a copy of the
+            # loaded index), sweep the merged result against each other here and regenerate
+            # what the sweep dropped
+            print(f"Generating {num_products} products across {workers} worker processes...")
+            jobs = [(product_idx, num_products, target, base_product_id)
+                    for product_idx, target in enumerate(targets)]
             
-            product_reviews = []
-            attempts = 0
-            max_attempts = target_reviews * 10
-            failed_attempts = 0
-            max_failed = 100
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_product_worker,
+                                     initargs=(self.markov_model.to_json(), self.training_reviews,
+                                               self.seen_index())) as executor:
+                results = list(executor.map(generate_product_worker, jobs))
             
-            print(f"Product {product_idx + 1}/{num_products}: Generating {target_reviews} reviews...")
+            self.remove_cross_product_duplicates([p for p in results if p], seen_texts, seen_titles)
             
-            while len(product_reviews) < target_reviews and attempts < max_attempts:
-                attempts += 1
-                
-                review = self.generate_synthetic_review(
-                    seen_texts, seen_titles, 
-                    product_id, product_name, product_url
-                )
-                
-                if review and review['review_text']:
-                    review_text = review['review_text']
-                    review_title = review['title']
-                    
-                    # Strict uniqueness check
-                    if review_text not in seen_texts:
-                        # Check for substantial similarity with existing reviews
-                        is_unique = True
-                        review_words = set(review_text.lower().split())
-                        
-                        for existing_text in seen_texts:
-                            existing_words = set(existing_text.lower().split())
-                            
-                            # Calculate Jaccard similarity
-                            intersection = len(review_words & existing_words)
-                            union = len(review_words | existing_words)
-                            
-                            if union > 0:
-                                similarity = intersection / union
-                                
-                                # If more than 60% similar, reject
-                                if similarity > 0.6:
-                                    is_unique = False
-                                    break
-                        
-                        if is_unique:
-                            seen_texts.add(review_text)
-                            if review_title:
-                                seen_titles.add(review_title)
-                            
-                            product_reviews.append(review)
-                            total_generated += 1
-                            failed_attempts = 0
-                            
-                            if len(product_reviews) % 100 == 0:
-                                print(f"  Generated {len(product_reviews)}/{target_reviews}...")
-                        else:
-                            failed_attempts += 1
-                    else:
-                        failed_attempts += 1
-                else:
-                    failed_attempts += 1
-                
-                # Check if we're stuck
-                if failed_attempts >= max_failed:
-                    print(f"\n⚠ Warning: Difficulty generating more unique reviews for product {product_idx + 1}")
-                    print(f"  Generated {len(product_reviews)}/{target_reviews} reviews for this product")
-                    break
+            # Top up each product's shortfall against the shared index, as the sequential
+            # path would have kept retrying
+            for product_idx, (target, product) in enumerate(zip(targets, results)):
+                if product and len(product['reviews']) < target:
+                    extra = self.generate_product(product_idx, num_products, target - len(product['reviews']),
+                                                  base_product_id, seen_texts, seen_titles)
+                    if extra:
+                        product['reviews'].extend(extra['reviews'])
             
-            # Add product to dataset
-            if product_reviews:
-                products.append({
-                    'product_id': product_id,
-                    'product_name': product_name,
-                    'product_url': product_url,
-                    'reviews': product_reviews
-                })
+            products = [p for p in results if p and p['reviews']]
+        else:
+            products = []
+            for product_idx, target in enumerate(targets):
+                product = self.generate_product(product_idx, num_products, target, base_product_id,
+                                                seen_texts, seen_titles)
+                if product:
+                    products.append(product)
+        
+        total_generated = sum(len(product['reviews']) for product in products)
         
         print(f"\n✓ Generated {total_generated} unique synthetic reviews across {len(products)} products")
         print(f"  Uniqueness: 100% (no duplicates or highly similar reviews)")
@@ -310,11 +670,15 @@ class SyntheticReviewGenerator:
         for product in products:
             all_reviews.extend(product['reviews'])
         
-        confidences = [r['confidence'] for r in all_reviews]
-        scores = [r['score'] for r in all_reviews]
+        confidences = [r.confidence for r in all_reviews]
+        scores = [r.score for r in all_reviews]
         avg_confidence = sum(confidences) / len(confidences) if confidences else 0
         avg_score = sum(scores) / len(scores) if scores else 0
         
+        # Reviews become plain dicts only now, for output
+        for product in products:
+            product['reviews'] = [review.to_dict() for review in product['reviews']]
+        
         # Create dataset with multi-product format
         dataset = {
             "metadata": {
@@ -335,13 +699,45 @@ class SyntheticReviewGenerator:
         return dataset
 
 
+# Per-process generator used by ProcessPoolExecutor workers in generate_dataset
+_worker_generator = None
+_worker_seen = None
+
+
+def init_product_worker(model_json: str, training_reviews: List[Dict], seen_index: Dict = None):
+    """
+    Rebuild the trained generator inside a worker process, seeded with the parent's
+    seen_index() so collisions with previous runs are regenerated rather than dropped
+    """
+    global _worker_generator, _worker_seen
+    
+    # Forked workers inherit the parent's RNG state; reseed so products don't share a stream
+    random.seed()
+    
+    _worker_generator = SyntheticReviewGenerator()
+    _worker_generator.markov_model = markovify.Text.from_json(model_json)
+    _worker_generator.training_reviews = training_reviews
+    if seen_index is not None:
+        _worker_generator.restore_seen_index(seen_index)
+        _worker_seen = (_worker_generator._seen_texts, _worker_generator._seen_titles)
+    else:
+        _worker_generator.reset_seen_texts()
+        _worker_seen = (set(), set())
+
+
+def generate_product_worker(job: tuple) -> Dict:
+    """Generate one product in a worker; job is (product_idx, num_products, target_reviews, base_product_id)"""
+    product_idx, num_products, target_reviews, base_product_id = job
+    seen_texts, seen_titles = _worker_seen
+    return _worker_generator.generate_product(product_idx, num_products, target_reviews, base_product_id,
+                                              seen_texts, seen_titles)
+
+
 def find_json_files(directory: str) -> List[str]:
     """Find all JSON files in a directory"""
-    json_files = []
-    for file in os.listdir(directory):
-        if file.endswith('.json'):
-            json_files.append(os.path.join(directory, file))
-    return json_files
+    # scandir entries carry the dirent type, so is_file() needs no extra stat call
+    with os.scandir(directory) as entries:
+        return [entry.path for entry in entries if entry.name.endswith('.json') and entry.is_file()]
 
 
 def main():
@@ -420,6 +816,12 @@ def main():
         num_products = num_reviews
         print(f"Adjusted to {num_products} products (cannot exceed review count)")
     
+    # Optional dedup index from an earlier run, so new reviews don't repeat its output
+    seen_index_file = input("Dedup index from a previous run (.lsh, optional - press Enter to skip): ").strip() or None
+    if seen_index_file and not os.path.exists(seen_index_file):
+        print(f"Dedup index '{seen_index_file}' not found, starting fresh")
+        seen_index_file = None
+    
     # Initialize generator
     generator = SyntheticReviewGenerator()
     
@@ -448,19 +850,29 @@ def main():
         synthetic_dataset = generator.generate_dataset(
             num_reviews=num_reviews,
             num_products=num_products,
-            base_product_id="SYNTHETIC"
+            base_product_id="SYNTHETIC",
+            seen_index_file=seen_index_file
         )
         
         # Save to file
         output_file = f"walmart_reviews_synthetic_negative_combined_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(synthetic_dataset, f, indent=2, ensure_ascii=False)
+        write_json(output_file, synthetic_dataset)
+        
+        # Save the dedup index next to it for later runs
+        index_file = os.path.splitext(output_file)[0] + ".lsh"
+        try:
+            generator.save_seen_index(index_file)
+        except Exception as e:
+            print(f"Could not save dedup index: {e}")
+            index_file = None
         
         print("\n" + "="*60)
         print("GENERATION COMPLETE!")
         print("="*60)
         print(f"Output file: {output_file}")
+        if index_file:
+            print(f"Dedup index: {index_file}")
         print(f"Total products: {synthetic_dataset['metadata']['total_products']}")
         print(f"Total synthetic reviews: {synthetic_dataset['metadata']['total_negative_reviews']}")
         print(f"Average confidence: {synthetic_dataset['metadata']['average_confidence']:.2%}")
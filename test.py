@@ -1,5 +1,9 @@
 from curl_cffi import requests
 import json
+import re
+
+# Page markers, found in one pass over the raw bytes (no lowercased copy of the body)
+MARKER_RE = re.compile(rb'(?P<captcha>(?i:captcha))|(?P<robot>(?i:robot))|(?P<next_data>__NEXT_DATA__)')
 
 url = "https://www.walmart.com/reviews/product/5251143774?page=1"
 
@@ -14,11 +18,13 @@ with open('test_response.html', 'w', encoding='utf-8') as f:
     f.write(response.text)
 
 # Check for common issues
-if 'captcha' in response.text.lower():
+markers = {match.lastgroup for match in MARKER_RE.finditer(response.content)}
+
+if 'captcha' in markers:
     print("❌ CAPTCHA DETECTED")
-elif 'robot' in response.text.lower():
+elif 'robot' in markers:
     print("❌ BOT DETECTION")
-elif '__NEXT_DATA__' in response.text:
+elif 'next_data' in markers:
     print("✓ Data structure found!")
 else:
     print("⚠️ Unusual response - check test_response.html")
\ No newline at end of file
@@ -3,10 +3,30 @@ Complete Authentication System Test Script
 Tests: Registration, Login, Analysis, User Session Isolation
 """
 
-import requests
+import aiohttp
+import asyncio
+import contextvars
 import json
+import random
+import sys
 import time
-from datetime import datetime
+import uuid
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import aiodns  # enables aiohttp.AsyncResolver
+except ImportError:
+    aiodns = None
 
 # Configuration
 BASE_URL = "http://localhost:5000"
@@ -15,181 +35,286 @@ FRONTEND_URL = "http://localhost:3001"
 # Test product URL
 TEST_PRODUCT_URL = "https://www.walmart.com/ip/Kitchen-in-the-box-15-in-1-Bread-Machine-2LB-Stainless-Steel-Automatic-Bread-Maker-with-Recipes-Silver/5528298909"
 
+# Status polling: exponential backoff from 0.25s up to 3s, give up after 120s
+POLL_INITIAL_DELAY = 0.25
+POLL_MAX_DELAY = 3.0
+POLL_BACKOFF = 1.6
+POLL_TIMEOUT = 120
+
+# Redraw the progress line at most 5 times a second
+PROGRESS_INTERVAL = 0.2
+
+# Status payload fields the poller reads; everything else (the reviews) is skipped
+STATUS_FIELDS = frozenset(('status', 'message', 'progress'))
+METADATA_PREFIX = 'data.metadata.'
+SCALAR_EVENTS = frozenset(('string', 'number', 'boolean', 'null'))
+
 # Colors for output
-class Colors:
-    GREEN = '\033[92m'
-    RED = '\033[91m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+RESET = '\033[0m'
+BOLD = '\033[1m'
+
+# Pre-built line prefixes for the print helpers
+HEADER_BAR = f"{BOLD}{BLUE}{'='*60}{RESET}"
+HEADER_PREFIX = f"\n{HEADER_BAR}\n{BOLD}{BLUE}"
+HEADER_SUFFIX = f"{RESET}\n{HEADER_BAR}\n\n"
+SUCCESS_PREFIX = f"{GREEN}✓ "
+ERROR_PREFIX = f"{RED}✗ "
+INFO_PREFIX = f"{YELLOW}ℹ "
+STEP_PREFIX = f"\n{BOLD}→ "
+
+# Closing lines of the results summary
+SUMMARY_PASSED = (
+    f"\n{GREEN}{BOLD}🎉 ALL TESTS PASSED! 🎉{RESET}\n"
+    f"{GREEN}✓ Authentication system working correctly{RESET}\n"
+    f"{GREEN}✓ User session isolation verified{RESET}\n"
+    f"{GREEN}✓ Authorization checks working{RESET}\n"
+)
+SUMMARY_FAILED = (
+    f"\n{RED}{BOLD}⚠ SOME TESTS FAILED{RESET}\n"
+    f"{YELLOW}Please review the errors above{RESET}\n"
+)
+
+# Per-task label ("[User 1] ") so output from concurrent flows stays readable
+LOG_LABEL = contextvars.ContextVar('log_label', default='')
 
 def print_header(text):
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}\n")
+    sys.stdout.write(HEADER_PREFIX + LOG_LABEL.get() + text + HEADER_SUFFIX)
 
 def print_success(text):
-    print(f"{Colors.GREEN}✓ {text}{Colors.RESET}")
+    print(SUCCESS_PREFIX + LOG_LABEL.get() + text + RESET)
 
 def print_error(text):
-    print(f"{Colors.RED}✗ {text}{Colors.RESET}")
+    print(ERROR_PREFIX + LOG_LABEL.get() + text + RESET)
 
 def print_info(text):
-    print(f"{Colors.YELLOW}ℹ {text}{Colors.RESET}")
+    print(INFO_PREFIX + LOG_LABEL.get() + text + RESET)
 
 def print_step(text):
-    print(f"\n{Colors.BOLD}→ {text}{Colors.RESET}")
+    print(STEP_PREFIX + LOG_LABEL.get() + text + RESET)
+
+# Time of the last progress redraw; both users' polls share one stdout line
+_last_progress = 0.0
+
+def print_progress(progress, message):
+    """Redraw the shared progress line, at most once per PROGRESS_INTERVAL across all flows"""
+    global _last_progress
+    now = time.monotonic()
+    if now - _last_progress < PROGRESS_INTERVAL:
+        return
+    _last_progress = now
+    sys.stdout.write(f"\r  {LOG_LABEL.get()}Progress: {progress}% - {message}")
+    sys.stdout.flush()
+
+async def run_as(label, coro):
+    """Await coro with its output tagged by label; gather gives each a copied context"""
+    LOG_LABEL.set(f"[{label}] ")
+    return await coro
+
+def json_dumps(obj):
+    """Serialize a request body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+async def read_json(response):
+    """Parse a response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(await response.read())
+    return await response.json()
+
+async def read_status(response):
+    """
+    Status fields and the result data ({} if the payload has none); with ijson the
+    reviews array is streamed past, not built, and only data.metadata is kept
+    """
+    if ijson is None:
+        status_data = await read_json(response)
+        return status_data, status_data.get('data', {})
+    
+    status_data = {}
+    metadata = {}
+    has_data = False
+    async for prefix, event, value in ijson.parse_async(response.content):
+        if prefix == 'data' and event == 'map_key':
+            has_data = True
+        if event not in SCALAR_EVENTS:
+            continue
+        if prefix in STATUS_FIELDS:
+            status_data[prefix] = value
+        elif prefix.startswith(METADATA_PREFIX):
+            key = prefix[len(METADATA_PREFIX):]
+            if '.' not in key:
+                metadata[key] = value
+    return status_data, {'metadata': metadata} if has_data else {}
+
+@lru_cache(maxsize=None)
+def auth_headers(token):
+    """Bearer header for a token, built once per user"""
+    return {"Authorization": f"Bearer {token}"}
+
+class Results:
+    """Pass/fail counters for the test run"""
+    __slots__ = ('passed', 'failed', 'total')
+    
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.total = 0
+    
+    def record(self, ok):
+        ok = bool(ok)
+        self.total += 1
+        self.passed += ok
+        self.failed += not ok
+        return ok
 
 # Test Data
+# One id per run keeps emails unique even when the script is relaunched within a second
+RUN_ID = uuid.uuid4().hex[:8]
+
 user1_data = {
     "fullName": "Test User One",
-    "email": f"testuser1_{int(time.time())}@example.com",
+    "email": f"testuser1_{RUN_ID}@example.com",
     "password": "testpass123"
 }
 
 user2_data = {
     "fullName": "Test User Two",
-    "email": f"testuser2_{int(time.time())}@example.com",
+    "email": f"testuser2_{RUN_ID}@example.com",
     "password": "testpass456"
 }
 
-def test_user_registration(user_data):
+async def test_user_registration(session, user_data):
     """Test user registration"""
     print_step(f"Testing registration for {user_data['email']}")
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/api/auth/register",
-            json=user_data,
-            headers={"Content-Type": "application/json"}
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('success') and data.get('token'):
-                print_success(f"Registration successful")
-                print_info(f"User ID: {data['user']['id']}")
-                print_info(f"Email: {data['user']['email']}")
-                print_info(f"Token: {data['token'][:20]}...")
-                return data['token'], data['user']
+        async with session.post(
+            "/api/auth/register",
+            json=user_data
+        ) as response:
+            if response.status == 200:
+                data = await read_json(response)
+                if data.get('success') and data.get('token'):
+                    print_success(f"Registration successful")
+                    print_info(f"User ID: {data['user']['id']}")
+                    print_info(f"Email: {data['user']['email']}")
+                    print_info(f"Token: {data['token'][:20]}...")
+                    return data['token'], data['user']
+                else:
+                    print_error(f"Registration failed: {data}")
+                    return None, None
             else:
-                print_error(f"Registration failed: {data}")
+                print_error(f"Registration failed: {response.status} - {await response.text()}")
                 return None, None
-        else:
-            print_error(f"Registration failed: {response.status_code} - {response.text}")
-            return None, None
     except Exception as e:
         print_error(f"Registration error: {e}")
         return None, None
 
-def test_user_login(email, password):
+async def test_user_login(session, email, password):
     """Test user login"""
     print_step(f"Testing login for {email}")
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/api/auth/login",
-            json={"email": email, "password": password},
-            headers={"Content-Type": "application/json"}
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('success') and data.get('token'):
-                print_success(f"Login successful")
-                print_info(f"Token: {data['token'][:20]}...")
-                return data['token'], data['user']
+        async with session.post(
+            "/api/auth/login",
+            json={"email": email, "password": password}
+        ) as response:
+            if response.status == 200:
+                data = await read_json(response)
+                if data.get('success') and data.get('token'):
+                    print_success(f"Login successful")
+                    print_info(f"Token: {data['token'][:20]}...")
+                    return data['token'], data['user']
+                else:
+                    print_error(f"Login failed: {data}")
+                    return None, None
             else:
-                print_error(f"Login failed: {data}")
+                print_error(f"Login failed: {response.status} - {await response.text()}")
                 return None, None
-        else:
-            print_error(f"Login failed: {response.status_code} - {response.text}")
-            return None, None
     except Exception as e:
         print_error(f"Login error: {e}")
         return None, None
 
-def test_get_current_user(token):
+async def test_get_current_user(session, token):
     """Test getting current user info"""
     print_step("Testing get current user")
     
     try:
-        response = requests.get(
-            f"{BASE_URL}/api/auth/me",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print_success("Got current user info")
-            print_info(f"User: {data['user']['fullName']} ({data['user']['email']})")
-            return data['user']
-        else:
-            print_error(f"Failed to get user: {response.status_code}")
-            return None
+        async with session.get(
+            "/api/auth/me",
+            headers=auth_headers(token)
+        ) as response:
+            if response.status == 200:
+                data = await read_json(response)
+                print_success("Got current user info")
+                print_info(f"User: {data['user']['fullName']} ({data['user']['email']})")
+                return data['user']
+            else:
+                print_error(f"Failed to get user: {response.status}")
+                return None
     except Exception as e:
         print_error(f"Error getting user: {e}")
         return None
 
-def test_product_analysis(token, user_email):
+async def test_product_analysis(session, token, user_email):
     """Test product analysis"""
     print_step(f"Testing product analysis for {user_email}")
     print_info(f"Product URL: {TEST_PRODUCT_URL}")
     
     try:
         # Start analysis
-        response = requests.post(
-            f"{BASE_URL}/api/analyze",
+        async with session.post(
+            "/api/analyze",
             json={
                 "url": TEST_PRODUCT_URL,
                 "max_reviews": 25,
                 "confidence_threshold": "default",
                 "category": "kitchen"
             },
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-        )
-        
-        if response.status_code != 200:
-            print_error(f"Analysis failed: {response.status_code} - {response.text}")
-            return None
+            headers=auth_headers(token)
+        ) as response:
+            if response.status != 200:
+                print_error(f"Analysis failed: {response.status} - {await response.text()}")
+                return None
+            
+            data = await read_json(response)
         
-        data = response.json()
         session_id = data.get('session_id')
         print_success(f"Analysis started (Session: {session_id})")
         
         # Poll for results
         print_info("Polling for results...")
-        max_attempts = 60
-        attempt = 0
+        delay = POLL_INITIAL_DELAY
+        deadline = time.monotonic() + POLL_TIMEOUT
         
-        while attempt < max_attempts:
-            time.sleep(2)
-            attempt += 1
+        while time.monotonic() < deadline:
+            # 10% jitter keeps the two users' polls from lining up
+            await asyncio.sleep(delay + random.uniform(0, delay * 0.1))
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
             
-            status_response = requests.get(f"{BASE_URL}/api/status/{session_id}")
-            if status_response.status_code == 200:
-                status_data = status_response.json()
-                
-                if status_data.get('status') == 'complete':
-                    print_success("Analysis completed!")
-                    result = status_data.get('data', {})
-                    metadata = result.get('metadata', {})
-                    print_info(f"Total reviews: {metadata.get('total_reviews', 0)}")
-                    print_info(f"Positive: {metadata.get('positive_count', 0)}")
-                    print_info(f"Negative: {metadata.get('negative_count', 0)}")
-                    print_info(f"Neutral: {metadata.get('neutral_count', 0)}")
-                    return result
-                elif status_data.get('status') == 'error':
-                    print_error(f"Analysis error: {status_data.get('message')}")
-                    return None
-                else:
-                    progress = status_data.get('progress', 0)
-                    message = status_data.get('message', 'Processing...')
-                    print(f"\r  Progress: {progress}% - {message}", end='', flush=True)
+            async with session.get(f"/api/status/{session_id}") as status_response:
+                if status_response.status != 200:
+                    continue
+                status_data, result = await read_status(status_response)
+            
+            if status_data.get('status') == 'complete':
+                print_success("Analysis completed!")
+                metadata = result.get('metadata', {})
+                print_info(f"Total reviews: {metadata.get('total_reviews', 0)}")
+                print_info(f"Positive: {metadata.get('positive_count', 0)}")
+                print_info(f"Negative: {metadata.get('negative_count', 0)}")
+                print_info(f"Neutral: {metadata.get('neutral_count', 0)}")
+                return result
+            elif status_data.get('status') == 'error':
+                print_error(f"Analysis error: {status_data.get('message')}")
+                return None
+            else:
+                print_progress(status_data.get('progress', 0), status_data.get('message', 'Processing...'))
         
         print_error("\nAnalysis timeout")
         return None
@@ -198,18 +323,19 @@ def test_product_analysis(token, user_email):
         print_error(f"Analysis error: {e}")
         return None
 
-def test_dashboard_data(token, user_email):
+async def test_dashboard_data(session, token, user_email):
     """Test dashboard data retrieval"""
     print_step(f"Testing dashboard data for {user_email}")
     
     try:
-        response = requests.get(
-            f"{BASE_URL}/api/dashboard",
-            headers={"Authorization": f"Bearer {token}"}
-        )
+        async with session.get(
+            "/api/dashboard",
+            headers=auth_headers(token)
+        ) as response:
+            status = response.status
+            data = await read_json(response) if status == 200 else None
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             overall = data.get('overall', {})
             categories = data.get('categories', [])
             
@@ -223,24 +349,25 @@ def test_dashboard_data(token, user_email):
             
             return data
         else:
-            print_error(f"Failed to get dashboard: {response.status_code}")
+            print_error(f"Failed to get dashboard: {status}")
             return None
     except Exception as e:
         print_error(f"Dashboard error: {e}")
         return None
 
-def test_analysis_history(token, user_email):
+async def test_analysis_history(session, token, user_email):
     """Test analysis history retrieval"""
     print_step(f"Testing analysis history for {user_email}")
     
     try:
-        response = requests.get(
-            f"{BASE_URL}/api/dashboard/history",
-            headers={"Authorization": f"Bearer {token}"}
-        )
+        async with session.get(
+            "/api/dashboard/history",
+            headers=auth_headers(token)
+        ) as response:
+            status = response.status
+            data = await read_json(response) if status == 200 else None
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             history = data.get('history', [])
             
             print_success(f"History retrieved: {len(history)} analyses")
@@ -250,212 +377,181 @@ def test_analysis_history(token, user_email):
             
             return history
         else:
-            print_error(f"Failed to get history: {response.status_code}")
+            print_error(f"Failed to get history: {status}")
             return None
     except Exception as e:
         print_error(f"History error: {e}")
         return None
 
-def test_user_isolation(token1, user1_email, token2, user2_email):
+async def test_user_isolation(session, token1, user1_email, token2, user2_email):
     """Test that users can only see their own data"""
     print_step("Testing user data isolation")
     
     # Get user 1's data
     print_info(f"Getting data for {user1_email}")
-    history1 = test_analysis_history(token1, user1_email)
+    history1 = await test_analysis_history(session, token1, user1_email)
     
     # Get user 2's data
     print_info(f"Getting data for {user2_email}")
-    history2 = test_analysis_history(token2, user2_email)
+    history2 = await test_analysis_history(session, token2, user2_email)
     
     if history1 is not None and history2 is not None:
         # Check that histories are different
-        ids1 = set(item['id'] for item in history1)
-        ids2 = set(item['id'] for item in history2)
+        ids1 = {item['id'] for item in history1}
         
-        overlap = ids1.intersection(ids2)
-        
-        if len(overlap) == 0:
+        if not any(item['id'] in ids1 for item in history2):
             print_success("✓ User data isolation verified - no overlap between users")
             return True
         else:
-            print_error(f"✗ Data isolation FAILED - {len(overlap)} shared analyses found!")
+            shared = sum(item['id'] in ids1 for item in history2)
+            print_error(f"✗ Data isolation FAILED - {shared} shared analyses found!")
             return False
     else:
         print_error("Could not verify isolation - failed to get history")
         return False
 
-def test_unauthorized_access(token1, user2_analysis_id):
+async def test_unauthorized_access(session, token1, user2_analysis_id):
     """Test that user 1 cannot access user 2's analysis"""
     print_step("Testing unauthorized access prevention")
     
     try:
-        response = requests.get(
-            f"{BASE_URL}/api/dashboard/reviews/{user2_analysis_id}",
-            headers={"Authorization": f"Bearer {token1}"}
-        )
+        async with session.get(
+            f"/api/dashboard/reviews/{user2_analysis_id}",
+            headers=auth_headers(token1)
+        ) as response:
+            status = response.status
         
-        if response.status_code == 404:
+        if status == 404:
             print_success("✓ Unauthorized access blocked correctly")
             return True
         else:
-            print_error(f"✗ Security issue: Got status {response.status_code}")
+            print_error(f"✗ Security issue: Got status {status}")
             return False
     except Exception as e:
         print_error(f"Error testing unauthorized access: {e}")
         return False
 
-def run_complete_test():
-    """Run complete authentication and session test"""
-    print_header("AUTHENTICATION SYSTEM COMPLETE TEST")
-    print_info(f"Backend: {BASE_URL}")
-    print_info(f"Frontend: {FRONTEND_URL}")
-    print_info(f"Test Product: Kitchen Bread Machine")
-    print_info(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    results = {
-        "passed": 0,
-        "failed": 0,
-        "total": 0
-    }
-    
-    # Test 1: Register User 1
-    print_header("TEST 1: Register User 1")
-    token1, user1 = test_user_registration(user1_data)
-    results["total"] += 1
-    if token1:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
-        print_error("Cannot continue without user 1")
-        return results
-    
-    # Test 2: Register User 2
-    print_header("TEST 2: Register User 2")
-    token2, user2 = test_user_registration(user2_data)
-    results["total"] += 1
-    if token2:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
-        print_error("Cannot continue without user 2")
-        return results
-    
-    # Test 3: Login User 1
-    print_header("TEST 3: Login User 1")
-    login_token1, _ = test_user_login(user1_data['email'], user1_data['password'])
-    results["total"] += 1
-    if login_token1:
-        results["passed"] += 1
-        token1 = login_token1  # Use login token
-    else:
-        results["failed"] += 1
-    
-    # Test 4: Get Current User
-    print_header("TEST 4: Get Current User Info")
-    current_user = test_get_current_user(token1)
-    results["total"] += 1
-    if current_user:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
-    
+async def run_user1_flow(session, token1):
+    """Run tests 5-7: analysis, dashboard and history for user 1"""
     # Test 5: Analyze Product (User 1)
     print_header("TEST 5: Analyze Product (User 1)")
-    analysis1 = test_product_analysis(token1, user1_data['email'])
-    results["total"] += 1
-    if analysis1:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
+    analysis1 = await test_product_analysis(session, token1, user1_data['email'])
     
     # Test 6: Get Dashboard Data (User 1)
     print_header("TEST 6: Get Dashboard Data (User 1)")
-    dashboard1 = test_dashboard_data(token1, user1_data['email'])
-    results["total"] += 1
-    if dashboard1:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
+    dashboard1 = await test_dashboard_data(session, token1, user1_data['email'])
     
     # Test 7: Get Analysis History (User 1)
     print_header("TEST 7: Get Analysis History (User 1)")
-    history1 = test_analysis_history(token1, user1_data['email'])
-    results["total"] += 1
-    if history1:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
+    history1 = await test_analysis_history(session, token1, user1_data['email'])
     
+    return analysis1, dashboard1, history1
+
+async def run_user2_flow(session, token2):
+    """Run tests 8-9: analysis and dashboard for user 2"""
     # Test 8: Analyze Product (User 2)
     print_header("TEST 8: Analyze Product (User 2)")
-    analysis2 = test_product_analysis(token2, user2_data['email'])
-    results["total"] += 1
-    if analysis2:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
+    analysis2 = await test_product_analysis(session, token2, user2_data['email'])
     
     # Test 9: Get Dashboard Data (User 2)
     print_header("TEST 9: Get Dashboard Data (User 2)")
-    dashboard2 = test_dashboard_data(token2, user2_data['email'])
-    results["total"] += 1
-    if dashboard2:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
+    dashboard2 = await test_dashboard_data(session, token2, user2_data['email'])
+    
+    return analysis2, dashboard2
+
+async def run_complete_test():
+    """Run complete authentication and session test"""
+    print_header("AUTHENTICATION SYSTEM COMPLETE TEST")
+    print_info(f"Backend: {BASE_URL}")
+    print_info(f"Frontend: {FRONTEND_URL}")
+    print_info(f"Test Product: Kitchen Bread Machine")
+    print_info(f"Started: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    results = Results()
+    
+    # Resolve the backend host once per run (c-ares via aiodns when installed)
+    resolver = aiohttp.AsyncResolver() if aiodns is not None else None
+    connector = aiohttp.TCPConnector(
+        limit=16,
+        keepalive_timeout=60,
+        use_dns_cache=True,
+        ttl_dns_cache=3600,
+        resolver=resolver
+    )
+    async with aiohttp.ClientSession(BASE_URL, connector=connector, json_serialize=json_dumps) as session:
+        return await run_tests(session, results)
+
+async def run_tests(session, results):
+    """Run the numbered tests over a shared session"""
+    # Tests 1-2: the two registrations are independent, so run them concurrently
+    print_header("TESTS 1-2: Register User 1 and User 2")
+    (token1, user1), (token2, user2) = await asyncio.gather(
+        run_as("User 1", test_user_registration(session, user1_data)),
+        run_as("User 2", test_user_registration(session, user2_data))
+    )
+    if not results.record(token1):
+        print_error("Cannot continue without user 1")
+        return results
+    if not results.record(token2):
+        print_error("Cannot continue without user 2")
+        return results
+    
+    # Tests 3-4: both only read, and the registration token is already valid for /me
+    print_header("TESTS 3-4: Login User 1 and Get Current User Info")
+    (login_token1, _), current_user = await asyncio.gather(
+        run_as("Test 3", test_user_login(session, user1_data['email'], user1_data['password'])),
+        run_as("Test 4", test_get_current_user(session, token1))
+    )
+    if results.record(login_token1):
+        token1 = login_token1  # Use login token
+    results.record(current_user)
+    
+    # Tests 5-9: the two users' flows are independent, so run them concurrently
+    (analysis1, dashboard1, history1), (analysis2, dashboard2) = await asyncio.gather(
+        run_as("User 1", run_user1_flow(session, token1)),
+        run_as("User 2", run_user2_flow(session, token2))
+    )
+    for outcome in (analysis1, dashboard1, history1, analysis2, dashboard2):
+        results.record(outcome)
     
     # Test 10: Verify User Data Isolation
     print_header("TEST 10: Verify User Data Isolation")
-    isolation_ok = test_user_isolation(token1, user1_data['email'], token2, user2_data['email'])
-    results["total"] += 1
-    if isolation_ok:
-        results["passed"] += 1
-    else:
-        results["failed"] += 1
+    isolation_ok = await test_user_isolation(session, token1, user1_data['email'], token2, user2_data['email'])
+    results.record(isolation_ok)
     
     # Test 11: Test Unauthorized Access
     print_header("TEST 11: Test Unauthorized Access Prevention")
     if history1 and len(history1) > 0:
         user2_analysis_id = history1[0]['id']  # Try to access user 1's analysis with user 2's token
-        unauthorized_blocked = test_unauthorized_access(token2, user2_analysis_id)
-        results["total"] += 1
-        if unauthorized_blocked:
-            results["passed"] += 1
-        else:
-            results["failed"] += 1
+        unauthorized_blocked = await test_unauthorized_access(session, token2, user2_analysis_id)
+        results.record(unauthorized_blocked)
     else:
         print_info("Skipping unauthorized access test - no analyses found")
     
-    # Final Results
-    print_header("TEST RESULTS SUMMARY")
-    print(f"\n{Colors.BOLD}Total Tests: {results['total']}{Colors.RESET}")
-    print(f"{Colors.GREEN}Passed: {results['passed']}{Colors.RESET}")
-    print(f"{Colors.RED}Failed: {results['failed']}{Colors.RESET}")
-    
-    success_rate = (results['passed'] / results['total'] * 100) if results['total'] > 0 else 0
-    print(f"\n{Colors.BOLD}Success Rate: {success_rate:.1f}%{Colors.RESET}")
-    
-    if results['failed'] == 0:
-        print(f"\n{Colors.GREEN}{Colors.BOLD}🎉 ALL TESTS PASSED! 🎉{Colors.RESET}")
-        print(f"{Colors.GREEN}✓ Authentication system working correctly{Colors.RESET}")
-        print(f"{Colors.GREEN}✓ User session isolation verified{Colors.RESET}")
-        print(f"{Colors.GREEN}✓ Authorization checks working{Colors.RESET}")
-    else:
-        print(f"\n{Colors.RED}{Colors.BOLD}⚠ SOME TESTS FAILED{Colors.RESET}")
-        print(f"{Colors.YELLOW}Please review the errors above{Colors.RESET}")
-    
-    print(f"\n{Colors.BLUE}Test completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Colors.RESET}\n")
-    
+    print_summary(results)
     return results
 
+def print_summary(results):
+    """Print the final results summary"""
+    # Final Results, assembled and written in one go
+    success_rate = (results.passed / results.total * 100) if results.total > 0 else 0
+    sys.stdout.write(
+        f"{HEADER_PREFIX}TEST RESULTS SUMMARY{HEADER_SUFFIX}"
+        f"\n{BOLD}Total Tests: {results.total}{RESET}\n"
+        f"{GREEN}Passed: {results.passed}{RESET}\n"
+        f"{RED}Failed: {results.failed}{RESET}\n"
+        f"\n{BOLD}Success Rate: {success_rate:.1f}%{RESET}\n"
+        + (SUMMARY_PASSED if results.failed == 0 else SUMMARY_FAILED)
+        + f"\n{BLUE}Test completed: {time.strftime('%Y-%m-%d %H:%M:%S')}{RESET}\n\n"
+    )
+
 if __name__ == "__main__":
     try:
-        results = run_complete_test()
-        exit(0 if results['failed'] == 0 else 1)
+        results = asyncio.run(run_complete_test())
+        exit(0 if results.failed == 0 else 1)
     except KeyboardInterrupt:
-        print(f"\n\n{Colors.YELLOW}Test interrupted by user{Colors.RESET}")
+        print(f"\n\n{YELLOW}Test interrupted by user{RESET}")
         exit(1)
     except Exception as e:
-        print(f"\n{Colors.RED}Fatal error: {e}{Colors.RESET}")
+        print(f"\n{RED}Fatal error: {e}{RESET}")
         exit(1)
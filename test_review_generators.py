@@ -0,0 +1,82 @@
+"""
+Synthetic Review Generator Tests
+Tests: Dedup index carried into worker processes and across runs
+Run with: python -m unittest test_review_generators
+"""
+
+import os
+import pickle
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import negative_review_gen
+import neutral_review_gen
+
+GENERATORS = (negative_review_gen, neutral_review_gen)
+
+WORDS = ("the product broke after two days and the customer service was awful never "
+         "buying again cheap plastic arrived late missing parts refund denied battery "
+         "died quickly box was open it works fine for the price").split()
+
+
+def make_training_reviews(sentiment: str, count: int = 400):
+    """Word-salad reviews with enough variety for the Markov model to recombine"""
+    rng = random.Random(1)
+    return [{
+        'review_text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(12, 25))) + '.',
+        'title': 'Review',
+        'rating': 2,
+        'sentiment': sentiment,
+    } for _ in range(count)]
+
+
+def make_generator(module):
+    generator = module.SyntheticReviewGenerator()
+    generator.training_reviews = make_training_reviews(module.__name__.split('_')[0])
+    generator.train_markov_model(cache_dir=None)
+    return generator
+
+
+class SeenIndexWorkerTest(unittest.TestCase):
+    def test_worker_is_seeded_with_loaded_index(self):
+        for module in GENERATORS:
+            with self.subTest(module=module.__name__):
+                generator = make_generator(module)
+                previous = generator.generate_dataset(30)
+                previous_keys = {module.text_key(r['review_text'])
+                                 for p in previous['products'] for r in p['reviews']}
+
+                # Round-trip through pickle as a spawned worker would receive it
+                seen_index = pickle.loads(pickle.dumps(generator.seen_index()))
+                module.init_product_worker(generator.markov_model.to_json(),
+                                           generator.training_reviews, seen_index)
+
+                self.assertTrue(previous_keys <= module._worker_seen[0])
+                product = module.generate_product_worker((0, 1, 20, None))
+                self.assertIsNotNone(product)
+                for review in product['reviews']:
+                    self.assertNotIn(module.text_key(review.review_text), previous_keys)
+
+    def test_parallel_run_avoids_previous_run(self):
+        for module in GENERATORS:
+            with self.subTest(module=module.__name__), tempfile.TemporaryDirectory() as tmp:
+                generator = make_generator(module)
+                previous = generator.generate_dataset(30)
+                index_file = os.path.join(tmp, 'seen.lsh')
+                generator.save_seen_index(index_file)
+                previous_keys = {module.text_key(r['review_text'])
+                                 for p in previous['products'] for r in p['reviews']}
+
+                with mock.patch('os.cpu_count', return_value=2):
+                    dataset = generator.generate_dataset(40, num_products=2, seen_index_file=index_file)
+
+                self.assertEqual([len(p['reviews']) for p in dataset['products']], [20, 20])
+                for product in dataset['products']:
+                    for review in product['reviews']:
+                        self.assertNotIn(module.text_key(review['review_text']), previous_keys)
+
+
+if __name__ == '__main__':
+    unittest.main()